@@ -25,22 +25,67 @@ All submitted code and documentation are supplied as open source and intended fo
 """
 
 import sys
+import hashlib
 import requests
 import urllib3
 import json
 import os
 import re
 import shutil
+import sqlite3
 import pandas as pd
-from datetime import datetime
-from typing import List, Dict, Optional
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
 import random
 import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+
+try:
+    from PIL import Image  # optional: perceptual hashing for near-duplicate pages
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Download concurrency (environment overrides for Docker/cron runs)
+CATALOGUE_WORKERS = int(os.getenv('CATALOGUE_WORKERS', 4))            # catalogues downloaded in parallel
+PAGE_WORKERS = int(os.getenv('CATALOGUE_PAGE_WORKERS', 16))           # page downloads in flight overall
+HOST_CONNECTIONS = int(os.getenv('CATALOGUE_HOST_CONNECTIONS', 8))    # open connections per CDN host
+API_WORKERS = int(os.getenv('CATALOGUE_API_WORKERS', 8))              # archive API requests in flight
+DOWNLOAD_CHUNK_SIZE = 256 * 1024                                      # bytes held in memory per page download
+VERIFY_CHECKSUMS = os.getenv('CATALOGUE_VERIFY_CHECKSUMS') == '1'     # re-hash existing pages on resume
+BACKUP_MODE = os.getenv('CATALOGUE_BACKUP_MODE', 'snapshot')          # 'snapshot' (hard links) or 'copy' (full copytree)
+SNAPSHOTS_KEEP = int(os.getenv('CATALOGUE_SNAPSHOTS_KEEP', 5))        # snapshots retained by prune_snapshots
+DEDUP_PAGES = os.getenv('CATALOGUE_DEDUP', '1') == '1'                # hard-link identical pages via PageStore
+NEAR_DUPLICATE_DISTANCE = int(os.getenv('CATALOGUE_NEAR_DUP_BITS', 6))  # max dHash bit difference reported as similar
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _copy_with_sha256(source_path: str, target_path: str) -> str:
+    """
+    Copy a file (keeping its timestamps) and hash it in the same pass
+    """
+    digest = hashlib.sha256()
+    with open(source_path, 'rb') as src, open(target_path, 'wb') as dst:
+        for chunk in iter(lambda: src.read(DOWNLOAD_CHUNK_SIZE), b''):
+            dst.write(chunk)
+            digest.update(chunk)
+    shutil.copystat(source_path, target_path)
+    return digest.hexdigest()
+
 
 def setup_logging():
     """Setup logging to file"""
@@ -103,6 +148,8 @@ class BackupManager:
     Handles full folder and file backup before refresh operations
     """
     
+    PARTIAL_SUFFIX = '.partial'
+    
     @staticmethod
     def backup_folder_structure(source_folder: str) -> Optional[str]:
         """
@@ -127,6 +174,127 @@ class BackupManager:
             logging.error(f"Backup ERROR: {str(e)}")
             return None
     
+    @staticmethod
+    def snapshot_folder(source_folder: str, snapshot_root: Optional[str] = None,
+                        keep: int = SNAPSHOTS_KEEP) -> Optional[str]:
+        """
+        Create a timestamped snapshot of the folder, rsync --link-dest style
+        Files whose size and mtime match the previous snapshot are hard-linked to
+        it, so only changed files use new space. Each snapshot has a manifest.json
+        with size, mtime and sha256 per file. Only the newest `keep` snapshots are kept
+        The snapshot is built under a .partial name and renamed once complete
+        Returns: snapshot folder path or None if source doesn't exist
+        """
+        if keep < 1:
+            raise ValueError(f"keep must be at least 1, got {keep}")
+        if not os.path.exists(source_folder):
+            logging.info(f"No existing folder to snapshot: {source_folder}")
+            return None
+        
+        snapshot_root = snapshot_root or f"{source_folder.rstrip(os.sep)}_snapshots"
+        os.makedirs(snapshot_root, exist_ok=True)
+        
+        previous_folder = BackupManager._latest_snapshot(snapshot_root)
+        previous_files = {}
+        if previous_folder:
+            with open(os.path.join(previous_folder, 'manifest.json'), 'r', encoding='utf-8') as f:
+                previous_files = json.load(f)['files']
+        
+        # Microseconds keep names unique and in creation order
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        snapshot_folder = os.path.join(snapshot_root, timestamp)
+        partial_folder = snapshot_folder + BackupManager.PARTIAL_SUFFIX
+        logging.info(
+            f"Creating snapshot from {source_folder} to {snapshot_folder}"
+            + (f" (linking unchanged files to {previous_folder})" if previous_folder else "")
+        )
+        
+        files = {}
+        linked = copied = 0
+        try:
+            for root, dirs, names in os.walk(source_folder):
+                # Blobs are other names for pages already in the snapshot
+                dirs[:] = [d for d in dirs if d != PageStore.BLOB_DIR]
+                for name in names:
+                    source_path = os.path.join(root, name)
+                    rel_path = os.path.relpath(source_path, source_folder).replace(os.sep, '/')
+                    target_path = os.path.join(partial_folder, rel_path)
+                    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                    
+                    stat = os.stat(source_path)
+                    previous = previous_files.get(rel_path)
+                    if previous and previous['size'] == stat.st_size and previous['mtime_ns'] == stat.st_mtime_ns:
+                        try:
+                            os.link(os.path.join(previous_folder, rel_path), target_path)
+                            files[rel_path] = previous
+                            linked += 1
+                            continue
+                        except OSError:
+                            pass  # previous copy missing or on another filesystem - copy instead
+                    
+                    digest = _copy_with_sha256(source_path, target_path)
+                    files[rel_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+                    copied += 1
+            
+            manifest = {
+                'created': datetime.now().isoformat(),
+                'source': os.path.abspath(source_folder),
+                'linked': linked,
+                'copied': copied,
+                'files': files,
+            }
+            os.makedirs(partial_folder, exist_ok=True)
+            with open(os.path.join(partial_folder, 'manifest.json'), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+            # Only a finished snapshot ever has its final name
+            os.rename(partial_folder, snapshot_folder)
+        except Exception as e:
+            logging.error(f"Snapshot ERROR: {str(e)}")
+            shutil.rmtree(partial_folder, ignore_errors=True)
+            return None
+        
+        logging.info(f"Snapshot SUCCESS - {len(files)} files ({linked} linked, {copied} copied)")
+        BackupManager.prune_snapshots(snapshot_root, keep)
+        return snapshot_folder
+    
+    @staticmethod
+    def _latest_snapshot(snapshot_root: str) -> Optional[str]:
+        complete = BackupManager._complete_snapshots(snapshot_root)
+        return complete[-1] if complete else None
+    
+    @staticmethod
+    def _complete_snapshots(snapshot_root: str) -> List[str]:
+        """
+        Finished snapshot folders (renamed from .partial, with a manifest), oldest first
+        """
+        if not os.path.exists(snapshot_root):
+            return []
+        folders = sorted(
+            os.path.join(snapshot_root, name) for name in os.listdir(snapshot_root)
+            if not name.endswith(BackupManager.PARTIAL_SUFFIX)
+        )
+        return [folder for folder in folders if os.path.exists(os.path.join(folder, 'manifest.json'))]
+    
+    @staticmethod
+    def prune_snapshots(snapshot_root: str, keep: int = SNAPSHOTS_KEEP):
+        """
+        Delete all but the newest `keep` snapshots, and anything an interrupted run left half-built
+        Hard-linked files stay on disk while any remaining snapshot still uses them
+        """
+        if keep < 1:
+            raise ValueError(f"keep must be at least 1, got {keep}")
+        if not os.path.exists(snapshot_root):
+            return
+        complete = BackupManager._complete_snapshots(snapshot_root)
+        for name in os.listdir(snapshot_root):
+            folder = os.path.join(snapshot_root, name)
+            if os.path.isdir(folder) and folder not in complete:
+                logging.info(f"Removing incomplete snapshot {folder}")
+                shutil.rmtree(folder, ignore_errors=True)
+        for folder in complete[:-keep]:
+            logging.info(f"Pruning old snapshot {folder}")
+            shutil.rmtree(folder, ignore_errors=True)
+    
     @staticmethod
     def backup_tracking_file(file_path: str) -> Optional[str]:
         """
@@ -152,49 +320,141 @@ class BackupManager:
 class CatalogueDatabase:
     """
     Handles catalogue tracking data storage
+    The working copy is a SQLite table keyed by slug, so marking a catalogue as
+    downloaded is a single indexed UPDATE. CSV (and JSON) are exported from it
+    every `export_every` updates and at the end of a run
     Supports CSV and JSON (MongoDB is not used in this version)
     """
     
-    def __init__(self, storage_type='csv', base_path='catalogue_data'):
+    COLUMNS = [
+        'store', 'title', 'slug', 'year', 'state', 'catalogue_on_sale_date',
+        'scraped_date', 'page_count', 'pages_downloaded', 'downloaded', 'id'
+    ]
+    
+    def __init__(self, storage_type='csv', base_path='catalogue_data', export_every=50):
         self.storage_type = storage_type
         self.base_path = base_path
         self.csv_file = os.path.join(base_path, 'catalogue_tracking.csv')
         self.json_file = os.path.join(base_path, 'catalogue_tracking.json')
+        self.sqlite_file = os.path.join(base_path, 'catalogue_tracking.sqlite')
+        self.export_every = export_every
+        self._pending_updates = 0
         
         os.makedirs(base_path, exist_ok=True)
+        
+        self.conn = sqlite3.connect(self.sqlite_file)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS catalogues ("
+            "store TEXT, title TEXT, slug TEXT PRIMARY KEY, year TEXT, state TEXT, "
+            "catalogue_on_sale_date TEXT, scraped_date TEXT, page_count INTEGER, "
+            "pages_downloaded INTEGER, downloaded INTEGER, id TEXT)"
+        )
+        self.conn.commit()
     
-    def load_existing_records(self) -> pd.DataFrame:
+    def _read_tracking_file(self) -> pd.DataFrame:
         """
-        Load existing catalogue records from storage
+        Load the exported CSV/JSON tracking file
         """
-        if self.storage_type == 'csv':
-            if os.path.exists(self.csv_file):
-                logging.info(f"Loading records from {self.csv_file}")
-                return pd.read_csv(self.csv_file)
-            else:
-                logging.info("No existing CSV found - starting fresh")
-                return pd.DataFrame()
-        
-        elif self.storage_type == 'json':
-            if os.path.exists(self.json_file):
-                logging.info(f"Loading records from {self.json_file}")
-                with open(self.json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                return pd.DataFrame(data)
-            else:
-                logging.info("No existing JSON found - starting fresh")
-                return pd.DataFrame()
+        if self.storage_type == 'json' and os.path.exists(self.json_file):
+            logging.info(f"Loading records from {self.json_file}")
+            with open(self.json_file, 'r', encoding='utf-8') as f:
+                return pd.DataFrame(json.load(f))
+        
+        if self.storage_type not in ('csv', 'json'):
+            # Fallback: treat unknown types as CSV
+            logging.warning(f"Unknown storage_type '{self.storage_type}', falling back to CSV")
         
-        # Fallback: treat unknown types as CSV
-        logging.warning(f"Unknown storage_type '{self.storage_type}', falling back to CSV")
         if os.path.exists(self.csv_file):
+            logging.info(f"Loading records from {self.csv_file}")
             return pd.read_csv(self.csv_file)
+        
+        logging.info(f"No existing {self.storage_type.upper()} found - starting fresh")
         return pd.DataFrame()
     
+    def _read_table(self) -> pd.DataFrame:
+        df = pd.read_sql_query("SELECT * FROM catalogues", self.conn)
+        if not df.empty:
+            df['downloaded'] = df['downloaded'].astype(bool)
+        return df
+    
+    def load_existing_records(self) -> pd.DataFrame:
+        """
+        Load existing catalogue records from storage
+        The tracking file stays the source of truth: it is imported into SQLite
+        whenever it is newer (e.g. copied in from another machine)
+        """
+        sqlite_time = os.path.getmtime(self.sqlite_file)
+        tracking_file = self.json_file if self.storage_type == 'json' else self.csv_file
+        table_empty = self.conn.execute("SELECT COUNT(*) FROM catalogues").fetchone()[0] == 0
+        
+        if os.path.exists(tracking_file) and (table_empty or os.path.getmtime(tracking_file) > sqlite_time):
+            df = self._read_tracking_file()
+            self.replace_records(df)
+            return df
+        
+        logging.info(f"Loading records from {self.sqlite_file}")
+        return self._read_table()
+    
+    def replace_records(self, df: pd.DataFrame):
+        """
+        Replace the whole table with df (after merging API data, or in refresh mode)
+        """
+        rows = []
+        if not df.empty:
+            table = df.reindex(columns=self.COLUMNS).astype(object)
+            table = table.where(table.notna(), None)
+            year_index = self.COLUMNS.index('year')
+            for row in table.itertuples(index=False):
+                row = list(row)
+                year = row[year_index]
+                row[year_index] = None if year is None else str(year)
+                rows.append(row)
+        
+        placeholders = ', '.join('?' for _ in self.COLUMNS)
+        with self.conn:
+            self.conn.execute("DELETE FROM catalogues")
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO catalogues ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                rows
+            )
+        logging.info(f"Tracking table holds {len(rows)} records")
+    
+    def mark_downloaded(self, slug: str, pages_downloaded: int, scraped_date: Optional[str] = None,
+                        complete: bool = True):
+        """
+        Record a finished catalogue; exports the tracking file every `export_every` updates.
+        An incomplete one (some pages failed) stays downloaded = 0 so update mode retries it
+        """
+        with self.conn:
+            self.conn.execute(
+                "UPDATE catalogues SET downloaded = ?, scraped_date = ?, pages_downloaded = ? WHERE slug = ?",
+                (int(complete), scraped_date or datetime.now().isoformat(), pages_downloaded, slug)
+            )
+        
+        self._pending_updates += 1
+        if self._pending_updates >= self.export_every:
+            self.export()
+    
+    def export(self, backup=False) -> pd.DataFrame:
+        """
+        Compact the table into the CSV/JSON tracking files
+        Returns: the exported records
+        """
+        df = self._read_table()
+        self._write_tracking_files(df, backup=backup)
+        self._pending_updates = 0
+        return df
+    
     def save_records(self, df: pd.DataFrame, backup=False):
         """
         Save catalogue records to storage
         """
+        self.replace_records(df)
+        self._write_tracking_files(df, backup=backup)
+    
+    def _write_tracking_files(self, df: pd.DataFrame, backup=False):
         if backup:
             BackupManager.backup_tracking_file(self.csv_file)
             BackupManager.backup_tracking_file(self.json_file)
@@ -210,6 +470,12 @@ class CatalogueDatabase:
             with open(self.json_file, 'w', encoding='utf-8') as f:
                 json.dump(records, f, indent=2, ensure_ascii=False)
             logging.info(f"Saved {len(df)} records to {self.json_file}")
+        
+        # The export is now the newest copy; keep SQLite from looking stale
+        os.utime(self.sqlite_file)
+    
+    def close(self):
+        self.conn.close()
 
 
 class CatalogueMetadataTracker:
@@ -307,50 +573,386 @@ class CatalogueMetadataTracker:
         return merged
 
 
+class PageStore:
+    """
+    Content-addressed store for downloaded page images
+    Every page is hashed on download; identical pages (e.g. the same week's
+    catalogue for several states) become hard links to one blob under
+    <output_folder>/.blobs/, and unique_pages() lists each distinct page once
+    for downstream OCR / tile detection. Only byte-identical pages are merged:
+    regional pages that differ just in printed prices look alike, so the
+    perceptual hash (dHash, needs Pillow) is only used to report similar pages
+    through near_duplicates()
+    """
+    
+    BLOB_DIR = '.blobs'
+    BANDS = 8  # dHash split into 8 bands of 8 bits; pages within 7 bits share at least one band
+    
+    def __init__(self, output_folder: str, index_path: str, max_distance: int = NEAR_DUPLICATE_DISTANCE):
+        self.blob_root = os.path.join(output_folder, self.BLOB_DIR)
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(index_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "path TEXT PRIMARY KEY, sha256 TEXT, dhash INTEGER, canonical TEXT, similar_to TEXT)"
+        )
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(pages)")]
+        if 'similar_to' not in columns:
+            # Indexes from before similar_to merged near-duplicates; split those back out
+            with self.conn:
+                self.conn.execute("ALTER TABLE pages ADD COLUMN similar_to TEXT")
+                self.conn.execute(
+                    "UPDATE pages SET similar_to = canonical, "
+                    "canonical = (SELECT MIN(same.path) FROM pages AS same WHERE same.sha256 = pages.sha256) "
+                    "WHERE canonical != path"
+                )
+                self.conn.execute("UPDATE pages SET similar_to = NULL WHERE similar_to = canonical")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS pages_sha256 ON pages (sha256)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS page_bands (band INTEGER, value INTEGER, path TEXT)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS page_bands_lookup ON page_bands (band, value)")
+        self.conn.commit()
+    
+    def _blob_path(self, sha256: str) -> str:
+        return os.path.join(self.blob_root, sha256[:2], f"{sha256}.jpg")
+    
+    def _link_to_blob(self, page_path: str, sha256: str):
+        """
+        Make page_path and the blob for sha256 the same file on disk
+        """
+        blob_path = self._blob_path(sha256)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        try:
+            # First copy of this content: the page itself becomes the blob
+            os.link(page_path, blob_path)
+            return
+        except FileExistsError:
+            pass
+        
+        if os.path.samefile(page_path, blob_path):
+            return
+        tmp_path = page_path + '.link'
+        os.link(blob_path, tmp_path)
+        os.replace(tmp_path, page_path)
+    
+    @staticmethod
+    def dhash(path: str) -> Optional[int]:
+        """
+        64-bit difference hash of the page, or None without Pillow
+        """
+        if not HAS_PIL:
+            return None
+        with Image.open(path) as img:
+            img.draft('L', (64, 64))  # let the JPEG decoder downscale while decoding
+            pixels = list(img.convert('L').resize((9, 8), Image.LANCZOS).getdata())
+        value = 0
+        for row in range(8):
+            for col in range(8):
+                value = (value << 1) | (pixels[row * 9 + col] < pixels[row * 9 + col + 1])
+        return value
+    
+    def _bands(self, value: int) -> List[Tuple[int, int]]:
+        return [(band, (value >> (band * 8)) & 0xFF) for band in range(self.BANDS)]
+    
+    def _near_duplicate(self, value: int, sha256: str) -> Optional[str]:
+        """
+        Closest other distinct page within max_distance bits of value, using the band index to find candidates
+        """
+        candidates = set()
+        for band, band_value in self._bands(value):
+            rows = self.conn.execute(
+                "SELECT path FROM page_bands WHERE band = ? AND value = ?", (band, band_value)
+            ).fetchall()
+            candidates.update(row[0] for row in rows)
+        
+        best = None
+        for path in sorted(candidates):
+            other, other_sha256, canonical = self.conn.execute(
+                "SELECT dhash, sha256, canonical FROM pages WHERE path = ?", (path,)
+            ).fetchone()
+            if other_sha256 == sha256:
+                continue
+            distance = bin((other ^ value) & 0xFFFFFFFFFFFFFFFF).count('1')
+            if distance <= self.max_distance and (best is None or distance < best[0]):
+                best = (distance, canonical)
+        return best[1] if best else None
+    
+    def add(self, page_path: str, sha256: str) -> str:
+        """
+        Register a freshly downloaded page
+        Returns: the canonical page it duplicates (or page_path itself if it is new)
+        """
+        try:
+            value = self.dhash(page_path)
+        except Exception as e:
+            logging.warning(f"dHash failed for {page_path}: {str(e)[:80]}")
+            value = None
+        # SQLite stores signed 64-bit integers
+        stored = value - (1 << 64) if value is not None and value >= (1 << 63) else value
+        
+        with self._lock:
+            self._link_to_blob(page_path, sha256)
+            
+            exact = self.conn.execute(
+                "SELECT canonical FROM pages WHERE sha256 = ? AND path != ? LIMIT 1", (sha256, page_path)
+            ).fetchone()
+            canonical = exact[0] if exact else page_path
+            similar_to = self._near_duplicate(stored, sha256) if value is not None and not exact else None
+            
+            with self.conn:
+                self.conn.execute("DELETE FROM page_bands WHERE path = ?", (page_path,))
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO pages (path, sha256, dhash, canonical, similar_to) VALUES (?, ?, ?, ?, ?)",
+                    (page_path, sha256, stored, canonical, similar_to)
+                )
+                if value is not None and canonical == page_path:
+                    # Only canonical pages are band-indexed; exact duplicates resolve to them
+                    self.conn.executemany(
+                        "INSERT INTO page_bands (band, value, path) VALUES (?, ?, ?)",
+                        [(band, band_value, page_path) for band, band_value in self._bands(value)]
+                    )
+        
+        if canonical != page_path:
+            logging.info(f"Duplicate page {page_path} -> {canonical}")
+        elif similar_to:
+            logging.info(f"Similar page {page_path} ~ {similar_to}")
+        return canonical
+    
+    def unique_pages(self) -> List[str]:
+        """
+        One page per group of identical pages
+        """
+        rows = self.conn.execute("SELECT path FROM pages WHERE canonical = path ORDER BY path").fetchall()
+        return [row[0] for row in rows]
+    
+    def near_duplicates(self) -> List[Tuple[str, str]]:
+        """
+        (page, similar page) pairs the perceptual hash found, for reporting only
+        """
+        rows = self.conn.execute(
+            "SELECT path, similar_to FROM pages WHERE similar_to IS NOT NULL ORDER BY path"
+        ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+    
+    def close(self):
+        self.conn.close()
+
+
 class CatalogueDownloader:
     """
     Downloads catalogue page images from CDN
+    Pages of a catalogue are fetched in parallel on a shared thread pool over one
+    pooled session, with at most HOST_CONNECTIONS requests in flight per host
     """
     
-    def __init__(self, output_folder='catalogues'):
+    def __init__(self, output_folder='catalogues', page_workers=PAGE_WORKERS, host_connections=HOST_CONNECTIONS,
+                 api_cache_dir: Optional[str] = None, page_store: Optional[PageStore] = None):
         self.output_folder = output_folder
+        self.api_cache_dir = api_cache_dir
+        self.page_store = page_store
         self.cdn_base = "https://caau.syd1.cdn.digitaloceanspaces.com/wp-content/uploads/catalogue"
+        self.page_workers = page_workers
+        self.host_connections = host_connections
         
         self.session = requests.Session()
         self.session.verify = False
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=host_connections)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        self.page_pool = ThreadPoolExecutor(max_workers=page_workers, thread_name_prefix='page')
+        self._host_slots = {}
+        self._host_lock = threading.Lock()
+    
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """
+        Per-host connection limit shared by every catalogue being downloaded
+        """
+        host = urlparse(url).netloc
+        with self._host_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.host_connections)
+            return self._host_slots[host]
+    
+    def close(self):
+        self.page_pool.shutdown(wait=True)
+        self.session.close()
+        if self.page_store:
+            self.page_store.close()
+    
+    def _fetch_archive(self, store: str, year: int) -> List[Dict]:
+        """
+        Fetch one (store, year) archive listing
+        Years that ended over a month ago no longer change, so once they return
+        catalogues they are served from the on-disk API cache
+        """
+        cache_path = os.path.join(self.api_cache_dir, f"{store}_{year}.json") if self.api_cache_dir else None
+        cacheable = year < (datetime.now() - timedelta(days=31)).year
+        
+        if cache_path and cacheable and os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            logging.info(f"API {store} {year}: {len(data)} catalogues (cached)")
+            return data
+        
+        api_url = f"https://www.catalogueau.com/api/web/catalogue/v1.php?get=archive&store={store}&year={year}&v1"
+        
+        try:
+            response = self.session.get(api_url, timeout=15)
+            
+            if response.status_code != 200:
+                logging.warning(f"API {store} {year}: HTTP {response.status_code}")
+                return []
+            
+            data = response.json()
+            if not isinstance(data, list):
+                logging.warning(f"API {store} {year}: unexpected response {str(data)[:60]}")
+                data = []
+            for cat in data:
+                cat['store_slug'] = store
+            
+            # Only a non-empty listing is cached - an empty or error body may be transient
+            if cache_path and cacheable and data:
+                os.makedirs(self.api_cache_dir, exist_ok=True)
+                tmp_path = cache_path + '.part'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, cache_path)
+            
+            if data:
+                logging.info(f"API {store} {year}: {len(data)} catalogues")
+            else:
+                logging.info(f"API {store} {year}: No catalogues found")
+            return data
+        except Exception as e:
+            logging.error(f"API {store} {year}: Error - {str(e)[:60]}")
+            return []
+    
+    def fetch_all_catalogues(self, stores: List[str], years: List[int], workers: int = API_WORKERS) -> List[Dict]:
+        """
+        Fetch catalogue metadata for every (store, year) concurrently
+        Results are merged as they arrive and returned in store/year order
+        """
+        jobs = [(store, year) for store in stores for year in years]
+        logging.info(f"Fetching {len(jobs)} archive listings for {', '.join(s.upper() for s in stores)}...")
+        
+        results = {}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api') as pool:
+            futures = {pool.submit(self._fetch_archive, store, year): (store, year) for store, year in jobs}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        
+        all_catalogues = [cat for job in jobs for cat in results[job]]
+        logging.info(f"API Total: {len(all_catalogues)} catalogues")
+        return all_catalogues
     
     def fetch_catalogues_from_api(self, store: str, years: List[int]) -> List[Dict]:
         """
         Fetch catalogue metadata from catalogueau.com API
         """
         logging.info(f"Fetching {store.upper()} catalogues...")
+        return self.fetch_all_catalogues([store], years)
+    
+    def _is_verified(self, output_path: str, record: Optional[Dict]) -> bool:
+        """
+        A page on disk is trusted only if metadata.json recorded it and the size
+        (and, with CATALOGUE_VERIFY_CHECKSUMS=1, the sha256) still match
+        """
+        if not record or not os.path.exists(output_path):
+            return False
+        if os.path.getsize(output_path) != record.get('bytes'):
+            return False
+        if VERIFY_CHECKSUMS:
+            return _file_sha256(output_path) == record.get('sha256')
+        return True
+    
+    def _download_page(self, image_url: str, output_path: str, page_num: int, stop: Dict,
+                       record: Optional[Dict] = None) -> Tuple[object, Optional[Dict]]:
+        """
+        Stream one page image to a .part file, check it against Content-Length
+        and rename it into place, so page_NNN.jpg is never a truncated file
+        Returns: (status, {'bytes', 'sha256'}) where status is
+        'ok', 'exists', 'failed', 'skipped' or 404
+        """
+        if self._is_verified(output_path, record):
+            return 'exists', record
         
-        base_api = "https://www.catalogueau.com/api/web/catalogue/v1.php"
-        all_catalogues = []
+        # Pages after a 404 are past the end of the catalogue
+        if page_num > stop['last_page']:
+            return 'skipped', None
         
-        for year in years:
-            api_url = f"{base_api}?get=archive&store={store}&year={year}&v1"
+        part_path = output_path + '.part'
+        try:
+            with self._host_slot(image_url):
+                with self.session.get(image_url, timeout=30, stream=True) as response:
+                    if response.status_code == 404:
+                        with self._host_lock:
+                            stop['last_page'] = min(stop['last_page'], page_num - 1)
+                        return 404, None
+                    
+                    if response.status_code != 200:
+                        logging.warning(f"Page {page_num} - HTTP {response.status_code}")
+                        return 'failed', None
+                    
+                    digest = hashlib.sha256()
+                    size = 0
+                    with open(part_path, 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+                            digest.update(chunk)
+                            size += len(chunk)
+                    
+                    expected_size = response.headers.get('Content-Length')
+                    # Content-Length is the encoded size, so only compare it for unencoded bodies
+                    if expected_size and not response.headers.get('Content-Encoding') and int(expected_size) != size:
+                        raise IOError(f"truncated download ({size} of {expected_size} bytes)")
             
+            os.replace(part_path, output_path)
+        except Exception as e:
+            logging.error(f"Page {page_num} - Error: {str(e)[:80]}")
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            return 'failed', None
+        
+        # The page is on disk whatever happens here, so a dedup error must not fail (and re-download) it
+        if self.page_store:
             try:
-                response = self.session.get(api_url, timeout=15)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    if isinstance(data, list) and len(data) > 0:
-                        for cat in data:
-                            cat['store_slug'] = store
-                        all_catalogues.extend(data)
-                        logging.info(f"API {year}: {len(data)} catalogues")
-                    else:
-                        logging.info(f"API {year}: No catalogues found")
-                else:
-                    logging.warning(f"API {year}: HTTP {response.status_code}")
+                self.page_store.add(output_path, digest.hexdigest())
             except Exception as e:
-                logging.error(f"API {year}: Error - {str(e)[:60]}")
+                logging.warning(f"Page {page_num} - dedup skipped: {str(e)[:80]}")
+        return 'ok', {'bytes': size, 'sha256': digest.hexdigest()}
+    
+    def _download_pages(self, base_url: str, catalogue_folder: str, pages, verified: Dict) -> Dict[int, Tuple]:
+        """
+        Download a set of pages concurrently
+        Returns: {page_num: (status, file record)}
+        """
+        stop = {'last_page': float('inf')}
+        futures = {}
+        for page_num in pages:
+            file_name = f"page_{page_num:03d}.jpg"
+            future = self.page_pool.submit(
+                self._download_page,
+                f"{base_url}/{page_num}.jpg",
+                os.path.join(catalogue_folder, file_name),
+                page_num,
+                stop,
+                verified.get(file_name),
+            )
+            futures[future] = page_num
         
-        logging.info(f"API Total: {len(all_catalogues)} catalogues")
-        return all_catalogues
+        results = {}
+        done = 0
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            if results[futures[future]][0] == 'ok':
+                done += 1
+                if done % 10 == 0:
+                    logging.info(f"Progress: {done}/{len(futures)} pages")
+        return results
     
     def download_single_catalogue(self, catalogue: Dict) -> Dict:
         """
@@ -377,70 +979,60 @@ class CatalogueDownloader:
         )
         
         base_url = f"{self.cdn_base}/{store}/{slug}"
+        metadata_path = os.path.join(catalogue_folder, 'metadata.json')
         
-        downloaded = 0
-        failed_pages = []
-        page_num = 1
-        consecutive_failures = 0
-        max_failures = 3
-        
-        while True:
-            image_url = f"{base_url}/{page_num}.jpg"
-            output_path = os.path.join(catalogue_folder, f"page_{page_num:03d}.jpg")
-            
-            if os.path.exists(output_path):
-                logging.info(f"Page {page_num} exists - skipping")
-                downloaded += 1
-                page_num += 1
-                consecutive_failures = 0
-                continue
-            
+        # Size/checksum of every page verified by an earlier run
+        verified = {}
+        if os.path.exists(metadata_path):
             try:
-                response = self.session.get(image_url, timeout=30)
-                
-                if response.status_code == 200:
-                    with open(output_path, 'wb') as f:
-                        f.write(response.content)
-                    
-                    downloaded += 1
-                    consecutive_failures = 0
-                    
-                    if downloaded % 10 == 0:
-                        logging.info(f"Progress: {downloaded}/{expected_pages} pages")
-                
-                elif response.status_code == 404:
-                    logging.info(f"Page {page_num} not found (404) - end of catalogue")
+                with open(metadata_path, 'r', encoding='utf-8') as f:
+                    verified = json.load(f).get('pages', {})
+            except (json.JSONDecodeError, OSError):
+                logging.warning(f"Unreadable metadata.json in {catalogue_folder} - re-verifying all pages")
+        
+        results = {}
+        if expected_pages > 0:
+            # Page count is known, so every page is scheduled up front
+            results = self._download_pages(base_url, catalogue_folder, range(1, expected_pages + 1), verified)
+        else:
+            # Unknown length: probe a window of pages at a time until the CDN returns 404
+            page_num = 1
+            while True:
+                window = range(page_num, page_num + self.page_workers)
+                batch = self._download_pages(base_url, catalogue_folder, window, verified)
+                results.update(batch)
+                statuses = [status for status, _ in batch.values()]
+                if 404 in statuses or all(status == 'failed' for status in statuses):
                     break
-                else:
-                    logging.warning(f"Page {page_num} - HTTP {response.status_code}")
-                    failed_pages.append(page_num)
-                    consecutive_failures += 1
-            
-            except Exception as e:
-                logging.error(f"Page {page_num} - Error: {str(e)[:80]}")
-                failed_pages.append(page_num)
-                consecutive_failures += 1
-            
-            if consecutive_failures >= max_failures:
-                logging.warning(f"Stopped after {consecutive_failures} consecutive failures")
-                break
-            
-            if expected_pages > 0 and downloaded >= expected_pages:
-                break
-            
-            page_num += 1
+                page_num += self.page_workers
+        
+        # A 404 marks the end of the catalogue; later pages are not counted
+        not_found = [page for page, (status, _) in results.items() if status == 404]
+        last_page = min(not_found) - 1 if not_found else max(results, default=0)
+        if not_found and expected_pages > 0:
+            logging.info(f"Page {last_page + 1} not found (404) - end of catalogue")
+        
+        pages = {
+            f"page_{page:03d}.jpg": record
+            for page, (status, record) in sorted(results.items())
+            if page <= last_page and status in ('ok', 'exists')
+        }
+        downloaded = len(pages)
+        failed_pages = sorted(page for page, (status, _) in results.items() if page <= last_page and status == 'failed')
         
         metadata = {
             **catalogue,
-            'downloaded': True,
+            'downloaded': not failed_pages,
             'scraped_date': datetime.now().isoformat(),
             'pages_downloaded': downloaded,
-            'failed_pages': failed_pages
+            'failed_pages': failed_pages,
+            'pages': pages
         }
         
-        metadata_path = os.path.join(catalogue_folder, 'metadata.json')
-        with open(metadata_path, 'w', encoding='utf-8') as f:
+        tmp_path = metadata_path + '.part'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
             json.dump(metadata, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, metadata_path)
         
         logging.info(
             f"DOWNLOAD COMPLETE! Downloaded {downloaded} pages"
@@ -619,7 +1211,11 @@ def main():
         base_path=os.path.join(script_dir, 'catalogue_data')
     )
     
-    downloader = CatalogueDownloader(output_folder=output_folder)
+    downloader = CatalogueDownloader(
+        output_folder=output_folder,
+        api_cache_dir=os.path.join(db.base_path, 'api_cache'),
+        page_store=PageStore(output_folder, os.path.join(db.base_path, 'page_index.sqlite')) if DEDUP_PAGES else None
+    )
     tracker = CatalogueMetadataTracker()
     
     # Refresh mode backups
@@ -629,7 +1225,10 @@ def main():
         print("="*70)
         logger.info("BACKUP PROCESS - REFRESH MODE")
         
-        BackupManager.backup_folder_structure(output_folder)
+        if BACKUP_MODE == 'copy':
+            BackupManager.backup_folder_structure(output_folder)
+        else:
+            BackupManager.snapshot_folder(output_folder)
         BackupManager.backup_tracking_file(db.csv_file)
         BackupManager.backup_tracking_file(db.json_file)
     
@@ -647,14 +1246,12 @@ def main():
     print("="*70)
     logger.info("FETCHING CATALOGUE METADATA FROM API")
     
-    all_api_catalogues = []
-    for store in config['stores']:
-        store_catalogues = downloader.fetch_catalogues_from_api(store, config['years'])
-        all_api_catalogues.extend(store_catalogues)
+    all_api_catalogues = downloader.fetch_all_catalogues(config['stores'], config['years'])
     
     tracker.load_from_api_data(all_api_catalogues)
     
     df = tracker.merge_with_existing(existing_df)
+    db.replace_records(df)
     
     # Filter by mode
     if config['mode'] == 'update':
@@ -697,28 +1294,36 @@ def main():
     total_catalogues = len(to_download)
     progress_interval = max(1, total_catalogues // 20)  # 5% steps
     
-    for idx, (_, catalogue) in enumerate(to_download.iterrows(), 1):
-        logger.info(f"[{idx}/{total_catalogues}] {catalogue['store'].upper()} - {catalogue['title']}")
-        
-        if idx % progress_interval == 0 or idx == total_catalogues:
-            progress_pct = (idx / total_catalogues) * 100
-            print(f"Progress: {progress_pct:.0f}% ({idx}/{total_catalogues} catalogues)")
+    # Catalogues download in parallel; tracking is updated here as each one finishes
+    with ThreadPoolExecutor(max_workers=CATALOGUE_WORKERS, thread_name_prefix='catalogue') as pool:
+        futures = {}
+        for idx, (_, catalogue) in enumerate(to_download.iterrows(), 1):
+            logger.info(f"[{idx}/{total_catalogues}] {catalogue['store'].upper()} - {catalogue['title']}")
+            futures[pool.submit(downloader.download_single_catalogue, catalogue.to_dict())] = catalogue['slug']
         
-        try:
-            result = downloader.download_single_catalogue(catalogue.to_dict())
+        for idx, future in enumerate(as_completed(futures), 1):
+            slug = futures[future]
             
-            df.loc[df['slug'] == catalogue['slug'], 'downloaded'] = True
-            df.loc[df['slug'] == catalogue['slug'], 'scraped_date'] = datetime.now().isoformat()
-            df.loc[df['slug'] == catalogue['slug'], 'pages_downloaded'] = result['pages_downloaded']
+            if idx % progress_interval == 0 or idx == total_catalogues:
+                progress_pct = (idx / total_catalogues) * 100
+                print(f"Progress: {progress_pct:.0f}% ({idx}/{total_catalogues} catalogues)")
             
-            db.save_records(df, backup=False)
-        
-        except Exception as e:
-            logger.error(f"Critical error for {catalogue['slug']}: {str(e)}")
-            continue
+            try:
+                result = future.result()
+                # Failed pages leave the catalogue pending; the next update run only fetches the missing ones
+                if result['failed_pages']:
+                    logger.warning(f"{slug}: {len(result['failed_pages'])} pages failed, will retry next run")
+                db.mark_downloaded(slug, result['pages_downloaded'], complete=not result['failed_pages'])
+            
+            except Exception as e:
+                logger.error(f"Critical error for {slug}: {str(e)}")
+                continue
+    
+    downloader.close()
     
-    # Final save with backup
-    db.save_records(df, backup=True)
+    # Final export with backup
+    df = db.export(backup=True)
+    db.close()
     
     print("\n" + "="*70)
     print("DOWNLOAD COMPLETE")
@@ -0,0 +1,93 @@
+import hashlib
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from catalogue_scraper_main import PageStore  # noqa: E402
+
+
+def write_page(folder, name, content):
+    path = os.path.join(folder, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    return path, hashlib.sha256(content).hexdigest()
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # Pages are not real JPEGs; dHash values are set per test through `hashes`
+    hashes = {}
+    monkeypatch.setattr(PageStore, "dhash", staticmethod(lambda path: hashes.get(path)))
+    page_store = PageStore(str(tmp_path), str(tmp_path / "page_index.sqlite"), max_distance=6)
+    page_store.hashes = hashes
+    yield page_store
+    page_store.close()
+
+
+def test_identical_pages_share_one_blob(store, tmp_path):
+    first, sha = write_page(str(tmp_path), "nsw/page_001.jpg", b"same page")
+    second, same_sha = write_page(str(tmp_path), "vic/page_001.jpg", b"same page")
+
+    assert store.add(first, sha) == first
+    assert store.add(second, same_sha) == first
+    assert os.path.samefile(first, second)
+    assert store.unique_pages() == [first]
+
+
+def test_different_pages_stay_separate(store, tmp_path):
+    first, sha = write_page(str(tmp_path), "nsw/page_001.jpg", b"page one")
+    second, other_sha = write_page(str(tmp_path), "nsw/page_002.jpg", b"page two")
+
+    assert store.add(first, sha) == first
+    assert store.add(second, other_sha) == second
+    assert not os.path.samefile(first, second)
+    assert store.unique_pages() == sorted([first, second])
+
+
+def test_similar_pages_are_reported_but_not_merged(store, tmp_path):
+    first, sha = write_page(str(tmp_path), "nsw/page_001.jpg", b"prices for nsw")
+    second, other_sha = write_page(str(tmp_path), "wa/page_001.jpg", b"prices for wa")
+    unrelated, unrelated_sha = write_page(str(tmp_path), "wa/page_002.jpg", b"another page")
+    store.hashes.update({first: 0b1010 << 40, second: (0b1010 << 40) | 0b111, unrelated: (1 << 64) - 1})
+
+    store.add(first, sha)
+    assert store.add(second, other_sha) == second
+    store.add(unrelated, unrelated_sha)
+
+    assert store.unique_pages() == sorted([first, second, unrelated])
+    assert store.near_duplicates() == [(second, first)]
+    assert not os.path.samefile(first, second)
+
+
+def test_pages_without_a_dhash_are_still_deduplicated(store, tmp_path):
+    first, sha = write_page(str(tmp_path), "nsw/page_001.jpg", b"same page")
+    second, _ = write_page(str(tmp_path), "sa/page_001.jpg", b"same page")
+
+    store.add(first, sha)
+    assert store.add(second, sha) == first
+    assert store.near_duplicates() == []
+
+
+def test_index_from_before_similar_to_is_migrated(tmp_path):
+    index_path = str(tmp_path / "page_index.sqlite")
+    conn = sqlite3.connect(index_path)
+    conn.execute("CREATE TABLE pages (path TEXT PRIMARY KEY, sha256 TEXT, dhash INTEGER, canonical TEXT)")
+    conn.executemany("INSERT INTO pages VALUES (?, ?, ?, ?)", [
+        ("a.jpg", "s1", 1, "a.jpg"),
+        ("b.jpg", "s1", 1, "a.jpg"),  # exact duplicate
+        ("c.jpg", "s2", 3, "a.jpg"),  # near duplicate the old store merged
+    ])
+    conn.commit()
+    conn.close()
+
+    page_store = PageStore(str(tmp_path), index_path)
+    try:
+        assert page_store.unique_pages() == ["a.jpg", "c.jpg"]
+        assert page_store.near_duplicates() == [("c.jpg", "a.jpg")]
+    finally:
+        page_store.close()
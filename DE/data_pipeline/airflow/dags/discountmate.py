@@ -2,8 +2,9 @@ import os
 import json
 from datetime import datetime
 from pymongo import MongoClient
-from scripts.ingestion import _ingest_to_minio, _check_minio_buckets
+from scripts.ingestion import _export_collection, _processed_file_path, _commit_watermarks, _check_minio_buckets
 from scripts.minio_processor import MinioCSVFileProcessor
+from scripts.pg_loader import _load_with_copy
 from airflow.decorators import dag, task
 from airflow.providers.docker.operators.docker import DockerOperator
 from airflow.operators.bash import BashOperator
@@ -27,6 +28,24 @@ POSTGRES_SCHEMA = os.getenv("POSTGRES_SCHEMA")
 POSTGRES_USER = os.getenv("POSTGRES_USER")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
 
+# Pool shared by the per-collection mapped tasks; its slot count caps how many run at once
+PIPELINE_POOL = os.getenv("DISCOUNTMATE_POOL", "discountmate_ingest")
+
+# spark: one spark-app container loading every file, several tables at a time; copy: COPY FROM STDIN from the Airflow worker (no Spark)
+DW_LOADER = os.getenv("DW_LOADER", "spark")
+
+LOADER_ENVIRONMENT = {
+    "MINIO_ACCESS_KEY_ID": MINIO_ACCESS_KEY_ID,
+    "MINIO_SECRET_ACCESS_KEY": MINIO_SECRET_ACCESS_KEY,
+    "MINIO_ENDPOINT": MINIO_ENDPOINT,
+    "POSTGRES_HOST": POSTGRES_HOST,
+    "POSTGRES_PORT": POSTGRES_PORT,
+    "POSTGRES_DATABASE": POSTGRES_DATABASE,
+    "POSTGRES_SCHEMA": POSTGRES_SCHEMA,
+    "POSTGRES_USER": POSTGRES_USER,
+    "POSTGRES_PASSWORD": POSTGRES_PASSWORD,
+}
+
 
 @dag(
     start_date=datetime(2022, 1, 1),
@@ -40,60 +59,60 @@ def pipeline():
         _check_minio_buckets()
 
     @task
-    def ingest_from_mongo_to_minio():
+    def list_collections():
         client = MongoClient(MONGO_URI)
-        db = client[MONGO_DB]
-        collections = db.list_collection_names()
-        file_paths = []
-
-        for collection_name in collections:
-            collection = db[collection_name]
-            data = list(collection.find())
-            if not data:
-                continue
-            serialized_data = json.dumps(data, default=str)
-            file_name = f"{collection_name}.json"
-            file_path = _ingest_to_minio(file_name, serialized_data.encode('utf-8'))
-            file_paths.append(file_path)
-
-        return file_paths
+        try:
+            return client[MONGO_DB].list_collection_names()
+        finally:
+            client.close()
 
-    @task
-    def process_file(file_paths: list):
+    # One mapped instance per collection, so collections run in parallel and a
+    # failed one can be cleared and retried on its own
+    @task(pool=PIPELINE_POOL, retries=2)
+    def ingest_from_mongo_to_minio(collection_name: str):
+        client = MongoClient(MONGO_URI)
+        try:
+            # Only documents newer than the collection's watermark, streamed as NDJSON
+            return _export_collection(client[MONGO_DB], collection_name)
+        finally:
+            client.close()
+
+    # all_done: each collection's watermark moves once its own export is in the warehouse.
+    # A collection that failed in ingest, processing or loading keeps its watermark and is
+    # exported again next run (the merge load replaces any rows that did make it)
+    @task(trigger_rule="all_done")
+    def commit_watermarks(processed_exports, loaded_paths):
+        # The spark-app container reports the files it loaded as a JSON line
+        if isinstance(loaded_paths, str):
+            loaded_paths = json.loads(loaded_paths)
+        _commit_watermarks(processed_exports, loaded_paths)
+
+    @task(pool=PIPELINE_POOL, retries=2)
+    def process_file(export):
+        # Nothing was exported for this collection (empty or no new documents)
+        if not export:
+            return None
         processor = MinioCSVFileProcessor()
-        processed_paths = []
-        for path in file_paths:
-            processed = processor._process_file(file_path=path)
-            processed_paths.append(processed)
-        return processed_paths
-
-    load_to_dw = DockerOperator(
-        task_id="load_to_dw",
-        image="spark-app",
-        api_version="auto",
-        auto_remove=True,
-        docker_url="tcp://docker-proxy:2375",
-        network_mode="container:spark-master",
-        tty=True,
-        mount_tmp_dir=False,
-        environment={
-            "MINIO_ACCESS_KEY_ID": MINIO_ACCESS_KEY_ID,
-            "MINIO_SECRET_ACCESS_KEY": MINIO_SECRET_ACCESS_KEY,
-            "MINIO_ENDPOINT": MINIO_ENDPOINT,
-            "POSTGRES_HOST": POSTGRES_HOST,
-            "POSTGRES_PORT": POSTGRES_PORT,
-            "POSTGRES_DATABASE": POSTGRES_DATABASE,
-            "POSTGRES_SCHEMA": POSTGRES_SCHEMA,
-            "POSTGRES_USER": POSTGRES_USER,
-            "POSTGRES_PASSWORD": POSTGRES_PASSWORD,
-            "PROCESSED_FILE_PATH_LIST_STR": "{{ task_instance.xcom_pull(task_ids='process_file') | tojson }}",
-        },
-    )
+        return {**export, "processed_path": processor._process_file(file_path=export["file_path"])}
+
+    # all_done: collections that processed fine are still loaded when another one failed.
+    # Every file goes to one container, so loaders.py loads the tables in parallel on a single
+    # Spark session; only the paths are passed, the credentials stay in private_environment, out of XCom
+    @task(trigger_rule="all_done")
+    def loader_environment(processed_paths):
+        return {"PROCESSED_FILE_PATH_LIST_STR": json.dumps([path for path in processed_paths if path])}
+
+    # all_done, as above; loads every table in one task, several tables at a time
+    @task(task_id="load_to_dw", trigger_rule="all_done")
+    def load_to_dw_with_copy(processed_paths):
+        return _load_with_copy(processed_paths)
 
     dbt_Path = "/opt/airflow/dags/discountmate_dbt"
 
+    # none_failed: still runs when no collection had anything new to load
     install_packages_in_dbt = BashOperator(task_id = "install_extensions_for_dbt",
-                                           bash_command = (f"cd {dbt_Path} && dbt deps"))
+                                           bash_command = (f"cd {dbt_Path} && dbt deps"),
+                                           trigger_rule = "none_failed")
 
     dbt_check_error = BashOperator(task_id = "check_error_free_in_dbt",
                                            bash_command = (f"cd {dbt_Path} && dbt compile"))
@@ -115,13 +134,40 @@ def pipeline():
     
     # Define DAG chain
     bucket_check = check_minio_buckets()
-    raw_file_path = ingest_from_mongo_to_minio()
-    processed_file_path = process_file(raw_file_path)
+    collection_names = list_collections()
+    raw_exports = ingest_from_mongo_to_minio.expand(collection_name=collection_names)
+    processed_exports = process_file.expand(export=raw_exports)
+    processed_file_path = processed_exports.map(_processed_file_path)
+    if DW_LOADER == "copy":
+        load_start = loaded = load_to_dw_with_copy(processed_file_path)
+        loaded_paths = loaded
+    else:
+        load_start = loader_environment(processed_file_path)
+        loaded = DockerOperator(
+            task_id="load_to_dw",
+            image="spark-app",
+            api_version="auto",
+            auto_remove=True,
+            docker_url="tcp://docker-proxy:2375",
+            network_mode="container:spark-master",
+            tty=True,
+            mount_tmp_dir=False,
+            pool=PIPELINE_POOL,
+            # Not templated or shown in the UI, unlike environment
+            private_environment=LOADER_ENVIRONMENT,
+            environment=load_start,
+            # The last output line, the JSON list of loaded files, is the XCom
+            do_xcom_push=True,
+        )
+        loaded_paths = loaded.output
 
     (bucket_check >> 
-    raw_file_path >> 
-    processed_file_path >> 
-    load_to_dw >> 
+    collection_names >>
+    raw_exports >> 
+    processed_exports >> 
+    load_start)
+    commit_watermarks(processed_exports, loaded_paths)
+    (loaded >> 
     install_packages_in_dbt >> 
     dbt_check_error >> 
     dbt_seed >> 
@@ -1,15 +1,26 @@
 {{
     config(
         materialized='incremental',
-        unique_key='product_pricing_sk'
+        unique_key='product_pricing_sk',
+        on_schema_change='append_new_columns'
     )
 }}
 
+-- loaded_at is when a row was first loaded or last changed; incremental runs
+-- only upsert those rows, so product_price_summary can pick up exactly what changed
+
 select
-    product_pricing_sk,
-    product_pricing_id,
-    product_id,
-    product_name,
-    date,
-    price
-from {{ ref('int_product_pricing') }}
\ No newline at end of file
+    pricing.product_pricing_sk,
+    pricing.product_pricing_id,
+    pricing.product_id,
+    pricing.product_name,
+    pricing.date,
+    pricing.price,
+    current_timestamp as loaded_at
+from {{ ref('int_product_pricing') }} as pricing
+{% if is_incremental() %}
+left join {{ this }} as existing on pricing.product_pricing_sk = existing.product_pricing_sk
+where existing.product_pricing_sk is null
+    or pricing.price is distinct from existing.price
+    or pricing.product_name is distinct from existing.product_name
+{% endif %}
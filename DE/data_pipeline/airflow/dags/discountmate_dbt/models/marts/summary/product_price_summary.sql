@@ -0,0 +1,81 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key='product_id',
+        on_schema_change='append_new_columns',
+        indexes=[{'columns': ['product_id'], 'unique': True}]
+    )
+}}
+
+-- One row per product: its latest price, and min/max/mean and discount frequency
+-- over the 30 days up to that price. The window is anchored on the product's own
+-- latest price rather than today, so a product without new prices keeps its row.
+-- Incremental runs recompute every product with a pricing row loaded or changed
+-- since the last run (fct_product_pricing.loaded_at), whatever its date, so
+-- back-dated and corrected prices are picked up too.
+
+with changed_products as (
+    select distinct pricing.product_id
+    from {{ ref('fct_product_pricing') }} as pricing
+    {% if is_incremental() %}
+    where pricing.loaded_at > (select coalesce(max(loaded_at), '-infinity') from {{ this }})
+    {% endif %}
+),
+
+pricing as (
+    select pricing.*
+    from {{ ref('fct_product_pricing') }} as pricing
+    inner join changed_products on pricing.product_id = changed_products.product_id
+),
+
+latest as (
+    select distinct on (product_id)
+        product_id,
+        product_name,
+        date as latest_price_date,
+        price as latest_price,
+        max(loaded_at) over (partition by product_id) as loaded_at
+    from pricing
+    order by product_id, date desc, product_pricing_id desc
+),
+
+window_prices as (
+    select
+        pricing.product_id,
+        pricing.price,
+        -- The highest price in the window stands in for the regular shelf price
+        max(pricing.price) over (partition by pricing.product_id) as regular_price
+    from pricing
+    inner join latest on pricing.product_id = latest.product_id
+    where pricing.date > latest.latest_price_date - interval '30 days'
+),
+
+window_stats as (
+    select
+        product_id,
+        min(price) as min_price_30d,
+        max(price) as max_price_30d,
+        round(avg(price), 2) as avg_price_30d,
+        count(*) as price_count_30d,
+        count(*) filter (where price < regular_price) as discount_count_30d,
+        round(avg((regular_price - price) / nullif(regular_price, 0)) filter (where price < regular_price), 4) as avg_discount_rate_30d
+    from window_prices
+    group by product_id
+)
+
+select
+    latest.product_id,
+    latest.product_name,
+    latest.latest_price,
+    latest.latest_price_date,
+    window_stats.min_price_30d,
+    window_stats.max_price_30d,
+    window_stats.avg_price_30d,
+    window_stats.price_count_30d,
+    window_stats.discount_count_30d,
+    round(window_stats.discount_count_30d::numeric / window_stats.price_count_30d, 4) as discount_frequency_30d,
+    window_stats.avg_discount_rate_30d,
+    latest.latest_price < window_stats.max_price_30d as is_discounted,
+    latest.loaded_at
+from latest
+inner join window_stats on latest.product_id = window_stats.product_id
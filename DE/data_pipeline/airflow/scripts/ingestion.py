@@ -1,9 +1,52 @@
 import io
+import json
+import os
+from airflow.models import Variable
+from bson import ObjectId
 from scripts.connectors import _get_minio_client
 
 RAW_BUCKET = 'raw'
 PROCESSED_BUCKET = 'processed'
 
+# Documents fetched per cursor round trip, and size of each multipart upload part
+MONGO_BATCH_SIZE = int(os.getenv("MONGO_BATCH_SIZE", 1000))
+UPLOAD_PART_SIZE = int(os.getenv("MINIO_UPLOAD_PART_SIZE", 16 * 1024 * 1024))
+
+
+class _IterStream(io.RawIOBase):
+    """
+    Read-only file object over an iterator of byte chunks, so put_object can
+    pull data as it uploads without the whole object ever being in memory
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            data = self._buffer + b"".join(self._chunks)
+            self._buffer = b""
+            return data
+        pieces, filled = [self._buffer], len(self._buffer)
+        while filled < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            pieces.append(chunk)
+            filled += len(chunk)
+        data = b"".join(pieces)
+        data, self._buffer = data[:size], data[size:]
+        return data
+
+
+def _ndjson_lines(cursor):
+    for document in cursor:
+        yield (json.dumps(document, default=str) + "\n").encode('utf-8')
+
 def _check_minio_buckets():
     minio_client = _get_minio_client()
     if not minio_client.bucket_exists(RAW_BUCKET):
@@ -21,4 +64,110 @@ def _ingest_to_minio(object_name, data):
         length=len(data),
     )
     file_path = f"{RAW_BUCKET}/{object_name}"
-    return file_path
\ No newline at end of file
+    return file_path
+
+
+def _stream_collection_to_minio(collection, object_name, query=None, batch_size=MONGO_BATCH_SIZE):
+    """
+    Upload a collection as newline-delimited JSON. Documents come off a batched
+    cursor and go out as a multipart upload, so memory stays at about one
+    upload part whatever the collection size. Returns None for an empty collection
+    """
+    cursor = collection.find(query or {}, batch_size=batch_size)
+    first = next(cursor, None)
+    if first is None:
+        return None
+
+    def documents():
+        yield first
+        yield from cursor
+
+    minio_client = _get_minio_client()
+    try:
+        minio_client.put_object(
+            bucket_name=RAW_BUCKET,
+            object_name=object_name,
+            data=_IterStream(_ndjson_lines(documents())),
+            length=-1,
+            part_size=UPLOAD_PART_SIZE,
+            content_type='application/x-ndjson',
+        )
+    finally:
+        cursor.close()
+    file_path = f"{RAW_BUCKET}/{object_name}"
+    return file_path
+
+
+def _watermark_key(collection_name):
+    return f"mongo_watermark__{collection_name}"
+
+
+def _export_collection(db, collection_name):
+    """
+    Export only what a collection gained since the last run.
+
+    The watermark is the highest ObjectId _id exported so far, kept in an Airflow
+    Variable per collection. The first export is a full one to raw/<collection>.json,
+    and its landing table is overwritten. Later exports hold only documents with
+    a newer _id and go to raw/<collection>/delta_<from>_<to>.json, which the
+    loader merges. A collection with nothing new is skipped. Collections whose
+    _id is not an ObjectId (e.g. uuid strings) have no order to resume from, so
+    they are still exported in full every run.
+
+    Returns {"collection", "file_path", "watermark"}, or None when nothing was exported.
+    The watermark is not advanced here: _commit_watermarks does that once the
+    export has been processed and loaded, so a collection that failed exports
+    the same documents again
+    """
+    collection = db[collection_name]
+    latest = collection.find_one(sort=[("_id", -1)], projection={"_id": 1})
+    if latest is None:
+        return None
+    upper = latest["_id"]
+    if not isinstance(upper, ObjectId):
+        file_path = _stream_collection_to_minio(collection, f"{collection_name}.json")
+        return {"collection": collection_name, "file_path": file_path, "watermark": None}
+
+    watermark = Variable.get(_watermark_key(collection_name), default_var=None)
+    if watermark == str(upper):
+        print(f"{collection_name}: no new documents since {watermark}, skipping")
+        return None
+
+    # Bounded above so documents inserted during the export wait for the next run
+    if watermark is None:
+        object_name = f"{collection_name}.json"
+        query = {"_id": {"$lte": upper}}
+    else:
+        object_name = f"{collection_name}/delta_{watermark}_{upper}.json"
+        query = {"_id": {"$gt": ObjectId(watermark), "$lte": upper}}
+
+    file_path = _stream_collection_to_minio(collection, object_name, query)
+    return {"collection": collection_name, "file_path": file_path, "watermark": str(upper)}
+
+
+def _processed_file_path(export):
+    return export["processed_path"] if export else None
+
+
+def _commit_watermarks(processed_exports, loaded_paths):
+    """
+    Advance the watermark of each collection whose export is in the warehouse.
+    processed_exports only holds the collections whose ingest and processing
+    succeeded, and loaded_paths the processed files the loader reported as loaded,
+    so a collection that failed anywhere keeps its watermark and is exported again
+    next run without holding back the others. Raises after committing when some
+    processed exports were not loaded, so the run still shows the failure
+    """
+    loaded = set(loaded_paths or [])
+    not_loaded = []
+    for export in processed_exports:
+        if not export:
+            continue
+        if export["processed_path"] not in loaded:
+            not_loaded.append(export["processed_path"])
+            continue
+        if export["watermark"]:
+            Variable.set(_watermark_key(export["collection"]), export["watermark"])
+            print(f"{export['collection']}: watermark advanced to {export['watermark']}")
+    if not_loaded:
+        raise RuntimeError(f"{len(not_loaded)} processed files were not loaded, their watermarks are kept: {not_loaded}")
@@ -1,61 +1,214 @@
 import os
+import re
 
 import duckdb
 
-from airflow.hooks.base import BaseHook
-
 PROCESSED_BUCKET = "processed"
 MINIO_ACCESS_KEY_ID = os.getenv("MINIO_ACCESS_KEY_ID")
 MINIO_SECRET_ACCESS_KEY = os.getenv("MINIO_SECRET_ACCESS_KEY")
 MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT")
 
+# Parquet output: rows per row group and compression codec
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("PARQUET_ROW_GROUP_SIZE", 122880))
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+
+# Declared types per source collection, matching what the dbt staging models cast to.
+# Values that do not fit become NULL (TRY_CAST) rather than failing the file.
+# Columns not listed are written as VARCHAR, as before: the staging models treat them
+# as text, and a type inferred per file would drift between deltas of one collection.
+COMMON_SCHEMA = {
+    "_id": "VARCHAR",
+    "timestamp": "TIMESTAMP",
+}
+SOURCE_SCHEMAS = {
+    "baskets": {"quantity": "BIGINT", "total_price": "DOUBLE", "date_created": "TIMESTAMP"},
+    "product_pricing": {"date": "TIMESTAMP", "price": "DOUBLE"},
+    "products": {"current_price": "DOUBLE", "product_code": "VARCHAR"},
+    "shopping_list_items": {"quantity": "BIGINT"},
+    "shopping_lists": {"date_created": "TIMESTAMP"},
+    "stores": {"post_code": "VARCHAR", "phone_number": "VARCHAR"},
+    "users": {"date_created": "TIMESTAMP", "latitude": "DOUBLE", "longitude": "DOUBLE"},
+}
+
+NESTED_TYPE_PREFIXES = ("STRUCT", "MAP", "UNION")
+
+# Scraped collections are named after the store and the run, e.g. IGA_Specials_2025-03-01_10-00-00,
+# 2025-03-01_10-00-00_Woolies, Drake_Products_2025-03-01 or coles_<location>_2025_03_01_1000.
+# They are written to one hive-partitioned dataset: processed/scraped/store=<store>/date=<date>/
+SCRAPED_PREFIX = "scraped"
+SCRAPED_COLLECTION_PATTERNS = [
+    re.compile(r"^(?P<store>[A-Za-z][A-Za-z_]*?)_(?P<date>\d{4}-\d{2}-\d{2})(?:_\d{2}-\d{2}-\d{2})?$"),
+    re.compile(r"^(?P<date>\d{4}-\d{2}-\d{2})_\d{2}-\d{2}-\d{2}_(?P<store>[A-Za-z][A-Za-z_]*)$"),
+    re.compile(r"^(?P<store>coles)_.+_(?P<date>\d{4}_\d{2}_\d{2})_\d{4}$", re.IGNORECASE),
+]
+STORE_ALIASES = {
+    "woolies": "woolworths",
+    "drake_products": "drake",
+    "iga_specials": "iga",
+    "iga_catalogue": "iga",
+}
+
+# Canonical scraped-product schema (the scrapers' CANONICAL_FIELDS plus image), with
+# the field names older scrapers used for the same thing. store and date come from the partition path
+SCRAPED_SCHEMA = {
+    "product_code": ("VARCHAR", ["product_code"]),
+    "category": ("VARCHAR", ["category", "Category"]),
+    "item_name": ("VARCHAR", ["item_name", "Name", "product_name"]),
+    "item_price": ("PRICE", ["item_price", "ItemPrice", "Previous Price", "original_price"]),
+    "best_price": ("PRICE", ["best_price", "Price", "discounted_price"]),
+    "unit_price": ("VARCHAR", ["unit_price", "UnitPrice", "Unit Price"]),
+    "special_text": ("VARCHAR", ["special_text", "SpecialText"]),
+    "promo_text": ("VARCHAR", ["promo_text", "PromoText"]),
+    "link": ("VARCHAR", ["link", "product_link"]),
+    "image": ("VARCHAR", ["image", "ImageURL", "Image URL"]),
+    "scraped_at": ("TIMESTAMP", ["scraped_at", "timestamp", "Timestamp"]),
+    "_id": ("VARCHAR", ["_id"]),
+}
+
+
+def _scraped_partition(collection):
+    """
+    (store, date) for a scraped-products collection name, None for anything else
+    """
+    for pattern in SCRAPED_COLLECTION_PATTERNS:
+        match = pattern.match(collection)
+        if match:
+            store = match.group("store").lower()
+            return STORE_ALIASES.get(store, store), match.group("date").replace("_", "-")
+    return None
+
+
+def _duckdb_connection():
+    """
+    New DuckDB connection that reads and writes MinIO through s3:// paths
+    """
+    # Imported here so the SQL helpers above can be used (and tested) without Airflow
+    from airflow.hooks.base import BaseHook
+
+    conn = duckdb.connect()
+
+    # In case you're using Airflow and prefer to get MinIO credentials from the Airflow connection, uncomment the following:
+    airflow_minio_connection = BaseHook.get_connection("minio")
+    conn.execute(f"""
+        SET s3_access_key_id = '{airflow_minio_connection.login}';
+        SET s3_secret_access_key = '{airflow_minio_connection.password}';
+        SET s3_endpoint = \'{airflow_minio_connection.extra_dejson["endpoint_url"].split("//")[1]}\';
+        SET s3_url_style = 'path';
+        SET s3_use_ssl = false;
+        SET preserve_insertion_order = false;
+    """)
+    return conn
+
+
+def _is_nested(inferred_type):
+    return inferred_type.startswith(NESTED_TYPE_PREFIXES) or inferred_type.endswith("]")
+
+
+def _quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _literal(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _scraped_file_name(stem):
+    """
+    File name of a scraped export inside its partition. A delta (<collection>/delta_<from>_<to>)
+    is named after <from> only, so a retried export, whose <to> may have moved on,
+    replaces the earlier file instead of adding a second copy of the same rows
+    """
+    collection, _, export = stem.partition("/")
+    if not export:
+        return collection
+    return f"{collection}-{export.rsplit('_', 1)[0]}"
+
+
 class MinioCSVFileProcessor:
-    def __init__(self):
-        self.conn = duckdb.connect()
+    # One DuckDB connection (with its S3 settings) per worker process, shared by every instance
+    _conn = None
 
-        # In case you're using Airflow and prefer to get MinIO credentials from the Airflow connection, uncomment the following:
-        self.airflow_minio_connection = BaseHook.get_connection("minio")
-        self.conn.execute(f"""
-            SET s3_access_key_id = '{self.airflow_minio_connection.login}';
-            SET s3_secret_access_key = '{self.airflow_minio_connection.password}';
-            SET s3_endpoint = \'{self.airflow_minio_connection.extra_dejson["endpoint_url"].split("//")[1]}\';
-            SET s3_url_style = 'path';
-            SET s3_use_ssl = false;
-        """)
+    def __init__(self):
+        if MinioCSVFileProcessor._conn is None:
+            MinioCSVFileProcessor._conn = _duckdb_connection()
+        self.conn = MinioCSVFileProcessor._conn
 
     def _process_file(self, file_path):
         bucket, object_name = file_path.split("/", 1)
-        table_name = object_name.split(".")[0]
+        # Delta exports live under <collection>/, keep that layout in the processed bucket
+        stem = object_name.rsplit(".", 1)[0]
+        collection = stem.split("/")[0]
+        source = f"read_json_auto({_literal(f's3://{bucket}/{object_name}')})"
 
-        # Load data and infer schema
-        self.conn.execute(f"""
-            CREATE OR REPLACE TABLE temp_raw AS
-            SELECT * FROM read_json_auto('s3://{bucket}/{object_name}')
-        """)
+        # Inferred column types (DESCRIBE only samples the file, nothing is materialised)
+        columns = self.conn.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()
 
-        # Get column names
-        cols = self.conn.execute("PRAGMA table_info('temp_raw')").fetchall()
-        col_names = [col[1] for col in cols]  # col[1] is the column name
+        partition = _scraped_partition(collection)
+        if partition:
+            store, date = partition
+            column_types = {name: inferred_type for name, inferred_type, *_ in columns}
+            select_clause = self._scraped_select(column_types, collection, date)
+            # Deltas of the same collection sit next to it in the partition
+            output_stem = f"{SCRAPED_PREFIX}/store={store}/date={date}/{_scraped_file_name(stem)}"
+        else:
+            select_clause = ",\n".join(
+                self._column_expression(name, inferred_type, collection)
+                for name, inferred_type, *_ in columns
+            )
+            output_stem = stem
 
-        # Build the SELECT clause with casting
-        select_clause = ",\n".join([f"CAST({col} AS STRING) AS {col}" for col in col_names])
+        # Read, cast and write in a single pass
+        self._save_file(f"SELECT {select_clause} FROM {source}", output_stem)
+        processed_file_path = f"{PROCESSED_BUCKET}/{output_stem}.parquet"
+        return processed_file_path
 
-        # Create final table with string-typed columns
-        self.conn.execute(f"""
-            CREATE OR REPLACE TABLE {table_name} AS
-            SELECT {select_clause}
-            FROM temp_raw
-        """)
+    def _scraped_select(self, column_types, collection, date):
+        expressions = []
+        for field, (field_type, aliases) in SCRAPED_SCHEMA.items():
+            # Text of every alias present; 'N/A' and empty strings count as missing
+            texts = [
+                f"NULLIF(NULLIF(trim(CAST({self._as_text(alias, column_types[alias])} AS VARCHAR)), 'N/A'), '')"
+                for alias in aliases
+                if alias in column_types
+            ]
+            value = f"COALESCE({', '.join(texts)})" if texts else "NULL"
+            if field_type == "PRICE":
+                # '$4.50', '4.5' or 4.5; prefer the amount after a '$' ('2 for $5' is 5)
+                value = (
+                    f"TRY_CAST(COALESCE(NULLIF(regexp_extract({value}, '\\$\\s*([0-9]+(\\.[0-9]+)?)', 1), ''), "
+                    f"regexp_extract({value}, '([0-9]+(\\.[0-9]+)?)', 1)) AS DOUBLE)"
+                )
+            elif field_type == "TIMESTAMP":
+                value = f"COALESCE(TRY_CAST({value} AS TIMESTAMP), DATE '{date}')"
+            else:
+                value = f"CAST({value} AS VARCHAR)"
+            expressions.append(f"{value} AS {_quote(field)}")
+        expressions.append(f"{_literal(collection)} AS source_collection")
+        return ",\n".join(expressions)
 
-        # Save to Parquet
-        self._save_file(table_name)
-        processed_file_path = f"{PROCESSED_BUCKET}/{table_name}.parquet"
-        return processed_file_path
+    @staticmethod
+    def _as_text(name, inferred_type):
+        column = _quote(name)
+        if _is_nested(inferred_type):
+            return f"to_json({column})"
+        return column
 
-    
-    def _save_file(self, table_name):
+    def _column_expression(self, name, inferred_type, collection):
+        column = _quote(name)
+        declared = SOURCE_SCHEMAS.get(collection, {}).get(name) or COMMON_SCHEMA.get(name)
+        if declared:
+            # Nested values (e.g. an ObjectId serialised as a struct) keep their JSON text
+            if _is_nested(inferred_type):
+                return f"TRY_CAST(to_json({column}) AS {declared}) AS {column}"
+            return f"TRY_CAST({column} AS {declared}) AS {column}"
+        # Nested documents and arrays are stored as JSON text so every loader can take them
+        if _is_nested(inferred_type):
+            return f"CAST(to_json({column}) AS VARCHAR) AS {column}"
+        return f"CAST({column} AS VARCHAR) AS {column}"
+
+    def _save_file(self, select_sql, object_stem):
         self.conn.execute(f"""
-            COPY {table_name}
-            TO 's3://{PROCESSED_BUCKET}/{table_name}.parquet'
-            (FORMAT 'parquet');
-        """)
\ No newline at end of file
+            COPY ({select_sql})
+            TO {_literal(f's3://{PROCESSED_BUCKET}/{object_stem}.parquet')}
+            (FORMAT 'parquet', COMPRESSION '{PARQUET_COMPRESSION}', ROW_GROUP_SIZE {PARQUET_ROW_GROUP_SIZE});
+        """)
@@ -0,0 +1,203 @@
+"""
+Load processed Parquet files into the Postgres landing schema with COPY,
+without starting the Spark cluster. Selected in the DAG with DW_LOADER=copy.
+
+DuckDB reads each file from MinIO as Arrow record batches, which are
+converted to CSV one batch at a time and streamed by psycopg2 to
+COPY ... FROM STDIN, so neither the file nor a CSV copy of it is ever held
+whole in memory or on local disk. Tables load concurrently
+on a pooled set of connections. Table names and LOAD_MODE behave like the
+Spark loader (docker/spark-app/loaders.py).
+"""
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from psycopg2 import sql
+from psycopg2.pool import ThreadedConnectionPool
+from pyarrow import csv as pa_csv
+
+from scripts.ingestion import _IterStream
+from scripts.minio_processor import _duckdb_connection, _literal
+
+POSTGRES_HOST = os.getenv("POSTGRES_HOST")
+POSTGRES_PORT = os.getenv("POSTGRES_PORT")
+POSTGRES_DATABASE = os.getenv("POSTGRES_DATABASE")
+POSTGRES_SCHEMA = os.getenv("POSTGRES_SCHEMA")
+POSTGRES_USER = os.getenv("POSTGRES_USER")
+POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
+
+# merge (default): full exports truncate and refill their table, deltas are upserted on _id
+# append: every file is appended; overwrite: every table is dropped and recreated
+LOAD_MODE = os.getenv("LOAD_MODE", "merge")
+MERGE_KEY = os.getenv("LOAD_MERGE_KEY", "_id")
+# Tables loaded at once, one pooled connection each; rows per record batch streamed to COPY
+COPY_WORKERS = int(os.getenv("COPY_WORKERS", 4))
+COPY_BATCH_ROWS = int(os.getenv("COPY_BATCH_ROWS", 100000))
+
+# DuckDB column types to Postgres; anything else is loaded as text
+PG_TYPES = {
+    "VARCHAR": "text",
+    "BIGINT": "bigint",
+    "INTEGER": "integer",
+    "SMALLINT": "smallint",
+    "DOUBLE": "double precision",
+    "FLOAT": "real",
+    "BOOLEAN": "boolean",
+    "DATE": "date",
+    "TIMESTAMP": "timestamp",
+    "TIMESTAMP WITH TIME ZONE": "timestamptz",
+}
+
+_local = threading.local()
+
+
+def _duckdb():
+    # DuckDB connections are not shared between threads, so each loader thread has its own
+    if not hasattr(_local, "conn"):
+        _local.conn = _duckdb_connection()
+    return _local.conn
+
+
+def _target_table(file_path):
+    """
+    (table, incremental) for a processed file, named as the Spark loader names them
+    """
+    object_name = file_path.split('/', 1)[1]
+    if object_name.startswith("scraped/"):
+        return "lnd_scraped_products", True
+    table_name = f"lnd_{object_name.split('/')[0].split('.')[0]}".lower()
+    return table_name, "/" in object_name
+
+
+def _pg_type(duckdb_type):
+    if duckdb_type.startswith("DECIMAL"):
+        return "numeric"
+    return PG_TYPES.get(duckdb_type, "text")
+
+
+def _read_parquet(file_path):
+    """
+    Columns of one processed Parquet file, and a reader over its rows in record batches
+    of COPY_BATCH_ROWS. hive_partitioning adds store/date for files under processed/scraped/
+    """
+    source = f"read_parquet({_literal(f's3://{file_path}')}, hive_partitioning = true)"
+    conn = _duckdb()
+    columns = [(name, column_type) for name, column_type, *_ in conn.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()]
+    reader = conn.execute(f"SELECT * FROM {source}").fetch_record_batch(COPY_BATCH_ROWS)
+    return columns, reader
+
+
+def _csv_chunks(reader):
+    """
+    CSV bytes for each record batch, with the header on the first one only.
+    Nulls are written unquoted and strings quoted, so COPY keeps them apart
+    """
+    for index, batch in enumerate(reader):
+        buffer = io.BytesIO()
+        pa_csv.write_csv(batch, buffer, pa_csv.WriteOptions(include_header=index == 0))
+        yield buffer.getvalue()
+
+
+def _copy_file(cursor, table, file_path):
+    columns, reader = _read_parquet(file_path)
+    _copy_csv(cursor, table, file_path, columns, _IterStream(_csv_chunks(reader)))
+    print(f"Loaded: {file_path} -> {POSTGRES_SCHEMA}.{table}")
+
+
+def _copy_csv(cursor, table, file_path, columns, csv_file):
+    target = sql.Identifier(POSTGRES_SCHEMA, table)
+    column_list = sql.SQL(", ").join(sql.Identifier(name) for name, _ in columns)
+    definition = sql.SQL(", ").join(
+        sql.SQL("{} {}").format(sql.Identifier(name), sql.SQL(_pg_type(column_type)))
+        for name, column_type in columns
+    )
+    incremental = _target_table(file_path)[1]
+    names = [name for name, _ in columns]
+
+    if LOAD_MODE == "overwrite":
+        cursor.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(target))
+    cursor.execute(sql.SQL("CREATE TABLE IF NOT EXISTS {} ({})").format(target, definition))
+    # A collection that gained a field gets the column added, as in the Spark loader
+    for name, column_type in columns:
+        cursor.execute(
+            sql.SQL("ALTER TABLE {} ADD COLUMN IF NOT EXISTS {} {}").format(
+                target, sql.Identifier(name), sql.SQL(_pg_type(column_type))
+            )
+        )
+
+    # copy_expert pulls the CSV in chunks as it sends it, one record batch in memory at a time
+    copy = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv, HEADER true)")
+    if LOAD_MODE == "merge" and incremental and MERGE_KEY in names:
+        # COPY into a temporary stage, then replace the rows it has keys for
+        stage = sql.Identifier(f"{table}_stage")
+        cursor.execute(sql.SQL("CREATE TEMP TABLE {} ({}) ON COMMIT DROP").format(stage, definition))
+        cursor.copy_expert(copy.format(stage, column_list).as_string(cursor), csv_file)
+        cursor.execute(
+            sql.SQL("DELETE FROM {} AS target USING {} AS stage WHERE target.{} = stage.{}").format(
+                target, stage, sql.Identifier(MERGE_KEY), sql.Identifier(MERGE_KEY)
+            )
+        )
+        cursor.execute(
+            sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {}").format(target, column_list, column_list, stage)
+        )
+    else:
+        if LOAD_MODE == "merge" and not incremental:
+            # A full export replaces the table's rows but keeps the table itself
+            cursor.execute(sql.SQL("TRUNCATE {}").format(target))
+        cursor.copy_expert(copy.format(target, column_list).as_string(cursor), csv_file)
+
+
+def _load_table(pool, table, file_paths):
+    """
+    COPY the files for one table in order, each in its own transaction.
+    Returns the files that failed
+    """
+    connection = pool.getconn()
+    failed = []
+    try:
+        for file_path in file_paths:
+            try:
+                with connection:
+                    with connection.cursor() as cursor:
+                        _copy_file(cursor, table, file_path)
+            except Exception as e:
+                print(f"Failed to load {file_path}: {e}")
+                failed.append(file_path)
+    finally:
+        pool.putconn(connection)
+    return failed
+
+
+def _load_with_copy(file_paths):
+    """
+    Load processed files into Postgres, several tables at a time.
+    Returns the files that loaded; a failed file is only logged here, so the other
+    collections still have their watermarks committed (see _commit_watermarks)
+    """
+    files_by_table = {}
+    for file_path in file_paths:
+        if file_path:
+            files_by_table.setdefault(_target_table(file_path)[0], []).append(file_path)
+    if not files_by_table:
+        return []
+
+    workers = max(1, min(COPY_WORKERS, len(files_by_table)))
+    pool = ThreadedConnectionPool(
+        1, workers,
+        host=POSTGRES_HOST, port=POSTGRES_PORT, dbname=POSTGRES_DATABASE,
+        user=POSTGRES_USER, password=POSTGRES_PASSWORD,
+    )
+    failed = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_load_table, pool, table, paths) for table, paths in files_by_table.items()]
+            for future in futures:
+                failed.extend(future.result())
+    finally:
+        pool.closeall()
+
+    if failed:
+        print(f"{len(failed)} files failed to load: {failed}")
+    return [path for paths in files_by_table.values() for path in paths if path not in failed]
@@ -0,0 +1,70 @@
+import os
+import sys
+
+import duckdb
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from scripts.minio_processor import (  # noqa: E402
+    MinioCSVFileProcessor,
+    _literal,
+    _scraped_file_name,
+    _scraped_partition,
+)
+
+
+@pytest.mark.parametrize("collection, expected", [
+    ("IGA_Specials_2025-03-01_10-00-00", ("iga", "2025-03-01")),
+    ("IGA_Catalogue_2025-03-01", ("iga", "2025-03-01")),
+    ("2025-03-01_10-00-00_Woolies", ("woolworths", "2025-03-01")),
+    ("Drake_Products_2025-03-01", ("drake", "2025-03-01")),
+    ("Foodland_2025-03-01_10-00-00", ("foodland", "2025-03-01")),
+    ("coles_melbourne_2025_03_01_1000", ("coles", "2025-03-01")),
+    ("products", None),
+    ("product_pricing", None),
+    ("users_2025", None),
+])
+def test_scraped_partition(collection, expected):
+    assert _scraped_partition(collection) == expected
+
+
+def test_scraped_file_name_ignores_the_delta_upper_bound():
+    assert _scraped_file_name("IGA_Specials_2025-03-01") == "IGA_Specials_2025-03-01"
+    first = _scraped_file_name("IGA_Specials_2025-03-01/delta_aaa_bbb")
+    retry = _scraped_file_name("IGA_Specials_2025-03-01/delta_aaa_ccc")
+    assert first == retry == "IGA_Specials_2025-03-01-delta_aaa"
+
+
+@pytest.mark.parametrize("value", ["plain", "it's", "''", "a'); DROP TABLE users; --", ""])
+def test_literal_round_trips_through_duckdb(value):
+    assert duckdb.sql(f"SELECT {_literal(value)}").fetchone()[0] == value
+
+
+@pytest.fixture
+def processor():
+    MinioCSVFileProcessor._conn = duckdb.connect()
+    yield MinioCSVFileProcessor()
+    MinioCSVFileProcessor._conn = None
+
+
+def test_scraped_select_maps_old_field_names_to_the_canonical_schema(processor):
+    processor.conn.execute("""
+        CREATE TABLE scraped AS SELECT * FROM (VALUES
+            ('Milk 2L', '$4.50', '$5.00', 'https://a/1', '2025-03-01 09:30:00'),
+            ('Bread', '2 for $5', 'N/A', 'https://a/2', 'N/A'),
+            ('Eggs', '', '6.2', '', NULL)
+        ) AS t("Name", "Price", "ItemPrice", "product_link", "Timestamp")
+    """)
+    column_types = {name: "VARCHAR" for name in ["Name", "Price", "ItemPrice", "product_link", "Timestamp"]}
+    select_clause = processor._scraped_select(column_types, "it's_2025-03-01", "2025-03-01")
+
+    rows = processor.conn.execute(
+        f"SELECT item_name, best_price, item_price, link, CAST(scraped_at AS VARCHAR), source_collection, product_code "
+        f"FROM (SELECT {select_clause} FROM scraped) ORDER BY item_name"
+    ).fetchall()
+    assert rows == [
+        ("Bread", 5.0, None, "https://a/2", "2025-03-01 00:00:00", "it's_2025-03-01", None),
+        ("Eggs", None, 6.2, None, "2025-03-01 00:00:00", "it's_2025-03-01", None),
+        ("Milk 2L", 4.5, 5.0, "https://a/1", "2025-03-01 09:30:00", "it's_2025-03-01", None),
+    ]
@@ -43,15 +43,62 @@ CREATE TABLE product (
 );
 
 --  product_pricing
+--  partitioned by month (product_pricing_YYYY_MM), see db_init/migrations/0001_partition_product_pricing.sql
 CREATE TABLE product_pricing (
-    product_pricing_id SERIAL PRIMARY KEY,
+    product_pricing_id BIGINT GENERATED BY DEFAULT AS IDENTITY,
     product_id INTEGER NOT NULL REFERENCES product(product_id),
     date DATE NOT NULL,
     price DECIMAL(10, 2) NOT NULL, 
     best_price DECIMAL(10, 2),
     best_unit_price DECIMAL(10, 4),
-    unit_price DECIMAL(10, 4)
-);
+    unit_price DECIMAL(10, 4),
+    PRIMARY KEY (product_pricing_id, date)
+) PARTITION BY RANGE (date);
+
+CREATE INDEX product_pricing_product_id_date_idx ON product_pricing (product_id, date);
+CREATE INDEX product_pricing_date_brin_idx ON product_pricing USING BRIN (date);
+
+--  prices for months without their own partition yet
+CREATE TABLE product_pricing_default PARTITION OF product_pricing DEFAULT;
+
+--  product_pricing_YYYY_MM for the month containing month_start, taking over that month's rows from the default partition
+CREATE OR REPLACE FUNCTION create_product_pricing_partition(month_start DATE) RETURNS void AS $$
+DECLARE
+    first_day DATE := date_trunc('month', month_start)::date;
+    next_month DATE := (date_trunc('month', month_start) + interval '1 month')::date;
+    partition_name TEXT := 'product_pricing_' || to_char(month_start, 'YYYY_MM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN;
+    END IF;
+
+    EXECUTE format('CREATE TABLE %I (LIKE product_pricing INCLUDING DEFAULTS)', partition_name);
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM product_pricing_default WHERE date >= %L AND date < %L RETURNING *) '
+        'INSERT INTO %I SELECT * FROM moved',
+        first_day, next_month, partition_name
+    );
+    EXECUTE format(
+        'ALTER TABLE product_pricing ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        partition_name, first_day, next_month
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+--  every monthly partition from from_date to to_date
+CREATE OR REPLACE FUNCTION ensure_product_pricing_partitions(from_date DATE, to_date DATE) RETURNS void AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_date)::date;
+BEGIN
+    WHILE month_start <= to_date LOOP
+        PERFORM create_product_pricing_partition(month_start);
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+--  the current month and the next three
+SELECT ensure_product_pricing_partitions(current_date, (current_date + interval '3 months')::date);
 
 
 --  wish
@@ -16,4 +16,8 @@ airflow connections add 'postgres' \
     --conn-password 'postgres' \
     --conn-port '5432'
 
+# Pool for the per-collection ingest, process and load tasks of the discountmate DAG
+airflow pools set "${DISCOUNTMATE_POOL:-discountmate_ingest}" "${DISCOUNTMATE_POOL_SLOTS:-4}" \
+    'Parallel per-collection tasks in the discountmate pipeline'
+
 echo "Connections added successfully."
@@ -1,6 +1,8 @@
 # Import the SparkSession module
 import json
 import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 from pyspark.sql import SparkSession
 
@@ -17,15 +19,47 @@ POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
 
 PROCESSED_FILE_PATH_LIST_STR = os.getenv("PROCESSED_FILE_PATH_LIST_STR")
 
+# merge (default): full exports truncate and refill their table, deltas are upserted on _id
+# append: every file is appended; overwrite: every table is dropped and rewritten (old behaviour)
+LOAD_MODE = os.getenv("LOAD_MODE", "merge")
+MERGE_KEY = os.getenv("LOAD_MERGE_KEY", "_id")
+# Tables loaded at once (each file is its own Spark job), rows per JDBC batch, JDBC connections per file
+LOAD_PARALLELISM = int(os.getenv("LOAD_PARALLELISM", 4))
+JDBC_BATCH_SIZE = int(os.getenv("JDBC_BATCH_SIZE", 10000))
+JDBC_NUM_PARTITIONS = int(os.getenv("JDBC_NUM_PARTITIONS", 8))
 
-def _load_to_postgres():
-    # Create a SparkSession
-    spark = (
+# Spark column types to Postgres, for columns added to an existing table; anything else is text
+PG_TYPES = {
+    "string": "text",
+    "bigint": "bigint",
+    "int": "integer",
+    "smallint": "smallint",
+    "double": "double precision",
+    "float": "real",
+    "boolean": "boolean",
+    "date": "date",
+    "timestamp": "timestamp",
+}
+
+JDBC_URL = f"jdbc:postgresql://{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DATABASE}?reWriteBatchedInserts=true"
+JDBC_PROPERTIES = {
+    "user": POSTGRES_USER,
+    "password": POSTGRES_PASSWORD,
+    "driver": "org.postgresql.Driver",
+    "batchsize": str(JDBC_BATCH_SIZE),
+    "numPartitions": str(JDBC_NUM_PARTITIONS),
+}
+
+
+def _create_spark_session():
+    return (
         SparkSession.builder.appName("LoadToPostgres")
         .config(
             "spark.jars",
-            "spark/jars/postgresql-9.4.1207.jar,spark/jars/aws-java-sdk-bundle-1.11.1026.jar,spark/jars/hadoop-aws-3.3.2.jar",
+            "spark/jars/postgresql-42.7.4.jar,spark/jars/aws-java-sdk-bundle-1.11.1026.jar,spark/jars/hadoop-aws-3.3.2.jar",
         )
+        # Jobs submitted from the loader threads share the executors instead of queueing
+        .config("spark.scheduler.mode", "FAIR")
         .config("fs.s3a.access.key", MINIO_ACCESS_KEY_ID)
         .config("fs.s3a.secret.key", MINIO_SECRET_ACCESS_KEY)
         .config(
@@ -39,23 +73,157 @@ def _load_to_postgres():
         .config("fs.s3a.connection.timeout", "100")
         .getOrCreate()
     )
+
+
+def _execute_sql(spark, statements):
+    """
+    Run SQL statements on Postgres in one transaction, through the JDBC driver Spark already has
+    """
+    jvm = spark.sparkContext._gateway.jvm
+    connection = jvm.java.sql.DriverManager.getConnection(JDBC_URL, POSTGRES_USER, POSTGRES_PASSWORD)
+    try:
+        connection.setAutoCommit(False)
+        statement = connection.createStatement()
+        for sql in statements:
+            statement.execute(sql)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def _pg_type(data_type):
+    name = data_type.simpleString()
+    if name.startswith("decimal"):
+        return name.replace("decimal", "numeric")
+    return PG_TYPES.get(name, "text")
+
+
+def _add_missing_columns(df, table):
+    """
+    Statements adding the columns of df that table does not have yet. Keeps
+    merge and truncate loads working when a collection gains a field, which the
+    old drop-and-recreate used to absorb. A table that does not exist yet is left
+    for the write to create
+    """
+    return [
+        f'ALTER TABLE IF EXISTS {table} ADD COLUMN IF NOT EXISTS "{field.name}" {_pg_type(field.dataType)}'
+        for field in df.schema.fields
+    ]
+
+
+def _merge(spark, df, table):
+    """
+    Upsert df into table on MERGE_KEY: write a stage table, then delete the
+    matching rows and insert the stage rows in a single transaction. The stage
+    name is unique so concurrent loads into the same table do not collide
+    """
+    stage = f"{table}_stage_{uuid.uuid4().hex[:8]}"
+    df.write.jdbc(url=JDBC_URL, table=stage, mode="overwrite", properties=JDBC_PROPERTIES)
+    columns = ", ".join(f'"{column}"' for column in df.columns)
+    try:
+        _execute_sql(spark, [
+            f"CREATE TABLE IF NOT EXISTS {table} (LIKE {stage})",
+            *_add_missing_columns(df, table),
+            f'DELETE FROM {table} AS target USING {stage} AS stage WHERE target."{MERGE_KEY}" = stage."{MERGE_KEY}"',
+            f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {stage}",
+        ])
+    finally:
+        _execute_sql(spark, [f"DROP TABLE IF EXISTS {stage}"])
+
+
+def _target_table(file_path):
+    """
+    (table, incremental) for a processed file.
+    processed/<collection>.parquet is a full export of the collection,
+    processed/<collection>/delta_....parquet holds only new documents.
+    Every scraped-products partition file goes to one table across stores
+    """
+    object_name = file_path.split('/', 1)[1]
+    if object_name.startswith("scraped/"):
+        return f"{POSTGRES_SCHEMA}.LND_scraped_products", True
+    table_name = f"LND_{object_name.split('/')[0].split('.')[0]}"
+    return f"{POSTGRES_SCHEMA}.{table_name}", "/" in object_name
+
+
+def _load_file(spark, file_path):
+    print("=" * 100)
+    print(f"Reading: {file_path}")
+    bucket, object_name = file_path.split('/', 1)
+    if object_name.startswith("scraped/"):
+        # basePath makes Spark add the store=/date= partition columns from the path
+        df = spark.read.option("basePath", f"s3a://{bucket}/scraped").parquet(f"s3a://{file_path}")
+    else:
+        df = spark.read.parquet(f"s3a://{file_path}")
+
+    table, incremental = _target_table(file_path)
+    if LOAD_MODE == "merge" and incremental and MERGE_KEY in df.columns:
+        _merge(spark, df, table)
+    elif LOAD_MODE == "merge" and not incremental:
+        # Truncate keeps the table (and anything depending on it) instead of dropping it
+        _execute_sql(spark, _add_missing_columns(df, table))
+        df.write.jdbc(url=JDBC_URL, table=table, mode="overwrite",
+                      properties={**JDBC_PROPERTIES, "truncate": "true"})
+    else:
+        mode = "overwrite" if LOAD_MODE == "overwrite" else "append"
+        if mode == "append":
+            _execute_sql(spark, _add_missing_columns(df, table))
+        df.write.jdbc(url=JDBC_URL, table=table, mode=mode, properties=JDBC_PROPERTIES)
+    print(f"Loaded: {file_path} -> {table}")
+    print("=" * 100)
+
+
+def _load_table(spark, table, file_paths):
+    """
+    Load the files for one table in order; tables are loaded in parallel.
+    Returns the files that failed
+    """
+    # A scheduler pool per table, so the FAIR scheduler shares executors between tables
+    spark.sparkContext.setLocalProperty("spark.scheduler.pool", table)
+    failed = []
+    for file_path in file_paths:
+        try:
+            _load_file(spark, file_path)
+        except Exception as e:
+            print(f"Failed to load {file_path}: {e}")
+            failed.append(file_path)
+    return failed
+
+
+def _load_to_postgres():
     processed_file_path_list = json.loads(
         PROCESSED_FILE_PATH_LIST_STR.replace("'", '"')
     )
+    # No collection had anything new to load
+    if not processed_file_path_list:
+        print(json.dumps([]))
+        return
+
+    # Create a SparkSession
+    spark = _create_spark_session()
+
+    files_by_table = {}
     for file_path in processed_file_path_list:
-        print("=" * 100)
-        print(f"Reading: {file_path}")
-        df = spark.read.parquet(f"s3a://{file_path}")
-        url = f"jdbc:postgresql://{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DATABASE}"
-        properties = {
-            "user": POSTGRES_USER,
-            "password": POSTGRES_PASSWORD,
-            "driver": "org.postgresql.Driver",
-        }
-        table_name = f"LND_{file_path.split('/')[-1].split('.')[0]}"
-        table = f"{POSTGRES_SCHEMA}.{table_name}"
-        df.write.jdbc(url=url, table=table, mode="overwrite", properties=properties)
-        print("=" * 100)
-    os.system("kill %d" % os.getpid())
-
-_load_to_postgres()
\ No newline at end of file
+        files_by_table.setdefault(_target_table(file_path)[0], []).append(file_path)
+
+    failed = []
+    try:
+        # Each table's files run as their own Spark jobs, in parallel with the other tables
+        with ThreadPoolExecutor(max_workers=max(1, LOAD_PARALLELISM)) as pool:
+            futures = [pool.submit(_load_table, spark, table, paths) for table, paths in files_by_table.items()]
+            for future in futures:
+                failed.extend(future.result())
+    finally:
+        spark.stop()
+
+    if failed:
+        print(f"{len(failed)} of {len(processed_file_path_list)} files failed to load: {failed}")
+    # The last line is the task's XCom: the files that loaded, whose collections get their
+    # watermarks committed. Failed files are reported there instead of failing the container
+    print(json.dumps([path for path in processed_file_path_list if path not in failed]))
+
+
+if __name__ == "__main__":
+    _load_to_postgres()
@@ -4,8 +4,13 @@ from sqlalchemy import create_engine, Column, Integer, String, Date, DECIMAL, Fo
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 from urllib.parse import quote
+import os
 import time
 
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+# Monthly product_pricing partitions kept ready ahead of the current month
+PARTITION_MONTHS_AHEAD = int(os.getenv("PRICING_PARTITION_MONTHS_AHEAD", 3))
+
 def connect_and_create(max_retries=5, delay=5):
     retries = 0
     while retries < max_retries:
@@ -109,12 +114,7 @@ def create_database(db_password="password",db_user="postgres",db_host="postgres"
         link = Column(String(255))
         link_image = Column(String(255))
 
-    class ProductPricing(Base):
-        __tablename__ = 'product_pricing'
-        product_pricing_id = Column(Integer, primary_key=True, autoincrement=True)
-        product_id = Column(Integer, ForeignKey('product.product_id'), nullable=False)
-        date = Column(Date, nullable=False)
-        price = Column(DECIMAL(10, 2), nullable=False)
+    # product_pricing is partitioned by month, so it is created by migrations/ instead (see run_migrations)
 
     class Wish(Base):
         __tablename__ = 'wish'
@@ -141,6 +141,51 @@ def create_database(db_password="password",db_user="postgres",db_host="postgres"
     Base.metadata.create_all(engine)
 
 
+def run_migrations(db_password="password",db_user="postgres",db_host="postgres",db_name="discountmate"):
+    """
+    Apply migrations/*.sql in name order, each once and in its own transaction.
+    Applied versions are recorded in schema_migrations
+    """
+    conn = psycopg2.connect(
+                dbname=db_name,
+                user=db_user,
+                password=db_password,
+                host=db_host,
+                port="5432"
+            )
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version VARCHAR(255) PRIMARY KEY,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+            """)
+            cur.execute("SELECT version FROM schema_migrations")
+            applied = {row[0] for row in cur.fetchall()}
+
+        for file_name in sorted(os.listdir(MIGRATIONS_DIR)):
+            version, ext = os.path.splitext(file_name)
+            if ext != ".sql" or version in applied:
+                continue
+            with open(os.path.join(MIGRATIONS_DIR, file_name), "r") as f:
+                migration = f.read()
+            with conn, conn.cursor() as cur:
+                cur.execute(migration)
+                cur.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (version,))
+            print(f"Applied migration {version}.")
+
+        # Prices for months without a partition go to product_pricing_default until one is created
+        with conn, conn.cursor() as cur:
+            cur.execute(
+                "SELECT ensure_product_pricing_partitions(current_date, (current_date + %s * interval '1 month')::date)",
+                (PARTITION_MONTHS_AHEAD,),
+            )
+    finally:
+        conn.close()
+
+
 if __name__ == "__main__":
     connect_and_create()
-    create_database()
\ No newline at end of file
+    create_database()
+    run_migrations()
\ No newline at end of file
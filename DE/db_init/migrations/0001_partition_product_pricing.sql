@@ -0,0 +1,98 @@
+-- product_pricing: monthly range partitions on date, with a (product_id, date)
+-- index for per-product price history and a BRIN index for time-range scans.
+-- An existing unpartitioned product_pricing is moved into the new table.
+
+-- Keep the old table aside if it was created before partitioning
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_class
+        WHERE oid = to_regclass('product_pricing') AND relkind = 'r'
+    ) THEN
+        ALTER TABLE product_pricing RENAME TO product_pricing_unpartitioned;
+        ALTER TABLE product_pricing_unpartitioned
+            RENAME CONSTRAINT product_pricing_pkey TO product_pricing_unpartitioned_pkey;
+    END IF;
+END $$;
+
+-- The partition key has to be part of the primary key
+CREATE TABLE IF NOT EXISTS product_pricing (
+    product_pricing_id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+    product_id INTEGER NOT NULL REFERENCES product(product_id),
+    date DATE NOT NULL,
+    price DECIMAL(10, 2) NOT NULL,
+    best_price DECIMAL(10, 2),
+    best_unit_price DECIMAL(10, 4),
+    unit_price DECIMAL(10, 4),
+    PRIMARY KEY (product_pricing_id, date)
+) PARTITION BY RANGE (date);
+
+-- Created on the parent, so every partition gets them
+CREATE INDEX IF NOT EXISTS product_pricing_product_id_date_idx ON product_pricing (product_id, date);
+CREATE INDEX IF NOT EXISTS product_pricing_date_brin_idx ON product_pricing USING BRIN (date);
+
+-- product_pricing_YYYY_MM for the month containing month_start
+CREATE OR REPLACE FUNCTION create_product_pricing_partition(month_start DATE) RETURNS void AS $$
+DECLARE
+    first_day DATE := date_trunc('month', month_start)::date;
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF product_pricing FOR VALUES FROM (%L) TO (%L)',
+        'product_pricing_' || to_char(first_day, 'YYYY_MM'),
+        first_day,
+        (first_day + interval '1 month')::date
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Every monthly partition from from_date to to_date. There is no default
+-- partition, so loaders call this for the date range they are about to insert
+CREATE OR REPLACE FUNCTION ensure_product_pricing_partitions(from_date DATE, to_date DATE) RETURNS void AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_date)::date;
+BEGIN
+    WHILE month_start <= to_date LOOP
+        PERFORM create_product_pricing_partition(month_start);
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Copy the old rows (only the columns both tables have) and carry on the id sequence
+DO $$
+DECLARE
+    first_date DATE;
+    last_date DATE;
+    shared_columns TEXT;
+BEGIN
+    IF to_regclass('product_pricing_unpartitioned') IS NULL THEN
+        PERFORM ensure_product_pricing_partitions(current_date, (current_date + interval '3 months')::date);
+        RETURN;
+    END IF;
+
+    SELECT min(date), max(date) INTO first_date, last_date FROM product_pricing_unpartitioned;
+    PERFORM ensure_product_pricing_partitions(
+        COALESCE(first_date, current_date),
+        GREATEST(last_date, (current_date + interval '3 months')::date)
+    );
+
+    SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position) INTO shared_columns
+    FROM information_schema.columns
+    WHERE table_schema = current_schema()
+        AND table_name = 'product_pricing_unpartitioned'
+        AND column_name IN (
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'product_pricing'
+        );
+
+    EXECUTE format(
+        'INSERT INTO product_pricing (%s) SELECT %s FROM product_pricing_unpartitioned',
+        shared_columns, shared_columns
+    );
+    PERFORM setval(
+        pg_get_serial_sequence('product_pricing', 'product_pricing_id'),
+        COALESCE((SELECT max(product_pricing_id) FROM product_pricing), 0) + 1,
+        false
+    );
+    DROP TABLE product_pricing_unpartitioned;
+END $$;
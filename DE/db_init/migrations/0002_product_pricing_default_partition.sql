@@ -0,0 +1,29 @@
+-- A DEFAULT partition catches prices for months that have no partition yet, so
+-- inserts never fail with "no partition of relation found" between db_init runs.
+CREATE TABLE IF NOT EXISTS product_pricing_default PARTITION OF product_pricing DEFAULT;
+
+-- product_pricing_YYYY_MM for the month containing month_start. Rows that already
+-- landed in the default partition for that month are moved into the new one,
+-- which PostgreSQL requires before the month can get its own partition
+CREATE OR REPLACE FUNCTION create_product_pricing_partition(month_start DATE) RETURNS void AS $$
+DECLARE
+    first_day DATE := date_trunc('month', month_start)::date;
+    next_month DATE := (date_trunc('month', month_start) + interval '1 month')::date;
+    partition_name TEXT := 'product_pricing_' || to_char(month_start, 'YYYY_MM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN;
+    END IF;
+
+    EXECUTE format('CREATE TABLE %I (LIKE product_pricing INCLUDING DEFAULTS)', partition_name);
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM product_pricing_default WHERE date >= %L AND date < %L RETURNING *) '
+        'INSERT INTO %I SELECT * FROM moved',
+        first_day, next_month, partition_name
+    );
+    EXECUTE format(
+        'ALTER TABLE product_pricing ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        partition_name, first_day, next_month
+    );
+END;
+$$ LANGUAGE plpgsql;
@@ -2,8 +2,10 @@
 # Script to push CSV data into MongoDB, overwriting existing documents (upsert)
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-from pymongo import MongoClient, errors
+from pandas.api.types import is_float_dtype, is_integer_dtype
+from pymongo import MongoClient, InsertOne, ReplaceOne, errors
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -12,6 +14,10 @@ load_dotenv()
 # Configuration
 MONGO_URI = os.getenv('MONGO_URI')
 DB_NAME = os.getenv('MONGO_DB', 'SampleData')
+# CSV rows read, and sent in one bulk_write, at a time
+CHUNK_SIZE = int(os.getenv('MONGO_CHUNK_SIZE', 5000))
+# Collections pushed at once
+MAX_WORKERS = int(os.getenv('MONGO_PUSH_WORKERS', 4))
 
 # Map CSV filenames to MongoDB collection names
 file_collection_map = {
@@ -25,41 +31,92 @@ file_collection_map = {
 }
 
 
-def main():
-    # Connect to MongoDB
-    client = MongoClient(MONGO_URI)
-    db = client[DB_NAME]
+def _operation(doc):
+    # Upsert by _id (overwrite if exists); rows without an _id are inserted as new documents
+    if '_id' in doc:
+        return ReplaceOne({'_id': doc['_id']}, doc, upsert=True)
+    return InsertOne(doc)
+
 
-    for file_name, coll_name in file_collection_map.items():
-        try:
-            # Read CSV
-            df = pd.read_csv(file_name)
+def _conform(chunk, dtypes):
+    """
+    Keep each numeric column on the dtype it had in the file's first chunk, so a field
+    does not switch between int and float across documents because one chunk has a
+    missing value. dtypes is filled from the first chunk and updated in place.
+    An int column with missing values keeps its values as ints (the missing ones stay
+    NaN, as in a float column); it is only widened to float, for the rest of the file,
+    once a real decimal shows up. Documents sent before that keep their ints, which is
+    the price of reading the file once instead of inferring dtypes in a separate pass
+    """
+    for column, dtype in chunk.dtypes.items():
+        expected = dtypes.setdefault(column, dtype)
+        if dtype == expected:
+            continue
+        values = chunk[column]
+        if is_float_dtype(expected) and is_integer_dtype(dtype):
+            chunk[column] = values.astype(expected)
+        elif is_integer_dtype(expected) and is_float_dtype(dtype):
+            if (values.dropna() % 1 == 0).all():
+                chunk[column] = pd.Series(
+                    [int(value) if pd.notna(value) else value for value in values],
+                    index=values.index, dtype=object
+                )
+            else:
+                dtypes[column] = dtype
+    return chunk
 
-            # Convert to list of dicts
-            docs = df.to_dict('records')
 
-            collection = db[coll_name]
+def push_file(db, file_name, coll_name):
+    """
+    Upsert one CSV into its collection, CHUNK_SIZE rows per unordered bulk_write,
+    so the file is never fully in memory and each chunk is one round trip
+    """
+    collection = db[coll_name]
+    upserted = replaced = inserted = failed = 0
+    try:
+        dtypes = {}
+        for chunk in pd.read_csv(file_name, chunksize=CHUNK_SIZE):
+            operations = [_operation(doc) for doc in _conform(chunk, dtypes).to_dict('records')]
+            # bulk_write raises InvalidOperation on an empty list
+            if not operations:
+                continue
+            try:
+                result = collection.bulk_write(operations, ordered=False).bulk_api_result
+            except errors.BulkWriteError as e:
+                # Unordered: the other operations of the chunk were still applied
+                result = e.details
+            upserted += result['nUpserted']
+            replaced += result['nMatched']
+            inserted += result['nInserted']
+            failed += len(result['writeErrors'])
 
-            # Upsert each document by its _id field (overwrite if exists)
-            upserted = 0
-            for doc in docs:
-                # Ensure _id exists for upsert key; if missing, insert new
-                if '_id' in doc:
-                    key = {'_id': doc['_id']}
-                else:
-                    key = {}  # will insert as new
+        print(f"Processed {file_name} → {coll_name}: upserted {upserted}, replaced {replaced}, "
+              f"inserted {inserted} documents, {failed} failed.")
 
-                # Perform replace_one with upsert
-                collection.replace_one(key, doc, upsert=True)
-                upserted += 1
+    except errors.PyMongoError as e:
+        print(f"MongoDB error on {file_name}: {e}")
+    except Exception as e:
+        print(f"Error processing {file_name}: {e}")
 
-            print(f"Processed {file_name} → {coll_name}: upserted/inserted {upserted} documents.")
 
-        except errors.PyMongoError as e:
-            print(f"MongoDB error on {file_name}: {e}")
-        except Exception as e:
-            print(f"Error processing {file_name}: {e}")
+def main():
+    # Connect to MongoDB; the client is thread-safe and shared by every worker
+    client = MongoClient(MONGO_URI)
+    db = client[DB_NAME]
+
+    # Push several collections concurrently
+    try:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = [
+                executor.submit(push_file, db, file_name, coll_name)
+                for file_name, coll_name in file_collection_map.items()
+            ]
+            # Re-raises anything push_file did not handle instead of dropping it with the future
+            for future in futures:
+                future.result()
+    finally:
+        client.close()
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
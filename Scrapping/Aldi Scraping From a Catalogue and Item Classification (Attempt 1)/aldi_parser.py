@@ -0,0 +1,187 @@
+"""
+Parser for Aldi catalogue text (PDF converted to text, e.g. with xodo).
+
+    from aldi_parser import parse_catalogue_text
+    df = parse_catalogue_text(open("xodo_result.txt").readlines())
+
+Extraction runs once over the whole column with pandas str.extract, and
+classification scans each item once with a single compiled keyword regex
+instead of checking every keyword of every category for each item.
+"""
+
+import re
+from typing import Dict, Iterable, List
+
+import pandas as pd
+
+# Item name, optional quantity (e.g. 150g, 750ml) and price
+LINE_PATTERN = re.compile(r"(?P<item>[A-Za-z\s']+)\s(?P<quantity>\d{1,4}[a-zA-Z]+)?\s?\$(?P<price>\d{1,2}\.\d{1,2})")
+LEADING_LETTER = re.compile(r"^[A-Za-z]\s")
+SINGLE_WORD = re.compile(r"^\w+$")
+
+# Define categories and keywords (order matters: an item goes to the first category that matches)
+CATEGORIES: Dict[str, List[str]] = {
+    'Fruit & Veg': [
+        'Bananas', 'Apples', 'Oranges', 'Grapes', 'Carrots', 'Potatoes', 'Sweet Potatoes',
+        'Tomatoes', 'Cucumber', 'Broccoli', 'Cauliflower', 'Spinach', 'Lettuce', 'Peppers',
+        'Zucchini', 'Mushrooms', 'Onions', 'Garlic', 'Strawberries', 'Blueberries', 'Avocado'
+    ],
+    'Bakery': [
+        'Bread', 'Wholemeal Bread', 'Croissant', 'Cake', 'Chocolate Cake', 'Muffin', 'Bagel',
+        'Donut', 'Baguette', 'Roll', 'Flatbread', 'Pita', 'Brioche', 'Shortbread',
+        'Sourdough', 'Focaccia', 'Ciabatta', 'Pastry'
+    ],
+    'Poultry, Meat & Seafood': [
+        'Chicken', 'Chicken Breast', 'Chicken Thigh', 'Beef', 'Steak', 'Pork', 'Lamb',
+        'Turkey', 'Bacon', 'Ham', 'Sausage', 'Salami', 'Duck', 'Fish', 'Salmon', 'Tuna',
+        'Shrimp', 'Prawns', 'Crab', 'Lobster', 'Cod', 'Haddock', 'Mussels'
+    ],
+    'Deli & Chilled Meals': [
+        'Ham', 'Salami', 'Prosciutto', 'Pasta Salad', 'Quiche', 'Soup', 'Coleslaw',
+        'Sandwich', 'Wrap', 'Sausage Roll', 'Ready Meals', 'Lasagna', 'Curry', 'Pizza',
+        'Deli Chicken', 'Meat Platter', 'Cheese Platter'
+    ],
+    'Dairy, Eggs & Fridge': [
+        'Milk', 'Almond Milk', 'Oat Milk', 'Soy Milk', 'Cheese', 'Cheddar Cheese', 'Mozzarella',
+        'Butter', 'Eggs', 'Free-Range Eggs', 'Greek Yogurt', 'Yogurt', 'Cream', 'Whipping Cream',
+        'Sour Cream', 'Cream Cheese', 'Custard'
+    ],
+    'Lunch Box': [
+        'Juice Box', 'Snack Bar', 'Muesli Bar', 'Granola Bar', 'Crackers', 'Rice Crackers',
+        'Fruit Cup', 'Cheese Stick', 'String Cheese', 'Sandwich', 'Mini Sandwich', 'Wrap',
+        'Chips', 'Popcorn', 'Dried Fruit', 'Nuts'
+    ],
+    'Pantry': [
+        'Rice', 'Brown Rice', 'Basmati Rice', 'Pasta', 'Spaghetti', 'Macaroni', 'Flour',
+        'Sugar', 'Brown Sugar', 'Canned Food', 'Canned Tomatoes', 'Canned Beans',
+        'Spices', 'Salt', 'Pepper', 'Paprika', 'Curry Powder', 'Oil', 'Olive Oil', 'Vegetable Oil',
+        'Vinegar', 'Honey', 'Peanut Butter', 'Jam', 'Cereal', 'Oats', 'Granola'
+    ],
+    'International Foods': [
+        'Soy Sauce', 'Curry Paste', 'Tortilla', 'Noodles', 'Rice Noodles', 'Soba Noodles',
+        'Sushi', 'Wasabi', 'Miso', 'Tikka Masala', 'Hoisin Sauce', 'Teriyaki Sauce',
+        'Pita Bread', 'Falafel', 'Hummus', 'Pad Thai', 'Kimchi', 'Gyoza', 'Spring Roll'
+    ],
+    'Snacks & Confectionery': [
+        'Chips', 'Potato Chips', 'Chocolate', 'Dark Chocolate', 'Milk Chocolate', 'Candy',
+        'Biscuits', 'Cookies', 'Lollies', 'Marshmallows', 'Popcorn', 'Nuts', 'Trail Mix',
+        'Pretzels', 'Chewing Gum', 'Mints'
+    ],
+    'Freezer': [
+        'Frozen Pizza', 'Frozen Vegetables', 'Frozen Chips', 'Frozen Fish', 'Frozen Peas',
+        'Frozen Corn', 'Ice Cream', 'Sorbet', 'Frozen Yogurt', 'Frozen Chicken',
+        'Frozen Sausages', 'Frozen Meatballs', 'Frozen Prawns', 'Frozen Spring Rolls',
+        'Frozen Dumplings', 'Frozen Fruit', 'Frozen Berries'
+    ]
+}
+
+DEFAULT_CATEGORY = 'Miscellaneous'
+
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """
+    Regex matching any of the words, with shared prefixes factored out
+    (e.g. 'frozen (?:chips|corn|...)') so each position is tested once per
+    character instead of once per keyword. Longer words are preferred
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+class KeywordClassifier:
+    """
+    Classifies items with one compiled regex of every keyword instead of
+    testing each keyword of each category in turn.
+
+    The pattern is a lookahead, so it reports the longest keyword starting at
+    every position of the item. Any shorter keyword found at the same position
+    is a substring of that longest one, so each keyword is ranked by the first
+    category among all keywords it contains. The smallest rank found in an item
+    is then its first matching category, the same result as checking the
+    categories in order
+    """
+
+    def __init__(self, category_dict: Dict[str, List[str]]):
+        self.categories = list(category_dict) + [DEFAULT_CATEGORY]
+        first_category = {}
+        for index, keywords in enumerate(category_dict.values()):
+            for keyword in keywords:
+                first_category.setdefault(keyword.lower(), index)
+
+        self.rank = {
+            keyword: min(index for other, index in first_category.items() if other in keyword)
+            for keyword in first_category
+        }
+        self.pattern = re.compile(f"(?=({trie_pattern(self.rank)}))")
+
+    def category_index(self, item: str) -> int:
+        found = self.pattern.findall(item.lower())
+        return min((self.rank[keyword] for keyword in found), default=len(self.categories) - 1)
+
+    def classify(self, items: pd.Series) -> pd.Series:
+        found = items.astype(str).str.lower().str.findall(self.pattern)
+        default = len(self.categories) - 1
+        indexes = [min((self.rank[keyword] for keyword in keywords), default=default) for keywords in found]
+        return pd.Series([self.categories[i] for i in indexes], index=items.index, dtype=object)
+
+
+CLASSIFIER = KeywordClassifier(CATEGORIES)
+
+
+def parse_lines(lines: Iterable[str]) -> pd.DataFrame:
+    """
+    Extract item, quantity and price from catalogue text lines
+    """
+    matches = pd.Series(list(lines), dtype=object).str.strip().str.extract(LINE_PATTERN)
+    df = matches.dropna(subset=['price']).reset_index(drop=True)
+    df['item'] = df['item'].str.strip()
+    df['quantity'] = df['quantity'].str.strip()
+    return df
+
+
+def clean_items(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Remove leading single letters from items and drop single-word items
+    """
+    df = df.copy()
+    df['item'] = df['item'].str.replace(LEADING_LETTER, '', regex=True)
+    df = df[~df['item'].str.match(SINGLE_WORD, na=False)]
+    return df.reset_index(drop=True)
+
+
+def classify(items: pd.Series, category_dict: Dict[str, List[str]] = CATEGORIES) -> pd.Series:
+    """
+    Category for each item (first matching category, else Miscellaneous)
+    """
+    classifier = CLASSIFIER if category_dict is CATEGORIES else KeywordClassifier(category_dict)
+    return classifier.classify(items)
+
+
+def classify_item(item: str, category_dict: Dict[str, List[str]] = CATEGORIES) -> str:
+    """
+    Category for a single item
+    """
+    classifier = CLASSIFIER if category_dict is CATEGORIES else KeywordClassifier(category_dict)
+    return classifier.categories[classifier.category_index(item)]
+
+
+def parse_catalogue_text(lines: Iterable[str]) -> pd.DataFrame:
+    """
+    Full pipeline: extract, clean and classify
+    """
+    df = clean_items(parse_lines(lines))
+    df['category'] = classify(df['item'])
+    return df
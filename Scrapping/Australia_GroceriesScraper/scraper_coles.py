@@ -4,6 +4,7 @@
 
 import json
 import os
+import sys
 import time
 import random
 import configparser
@@ -21,22 +22,26 @@ from selenium_stealth import stealth
 from datetime import datetime
 from pymongo import MongoClient
 from dotenv import load_dotenv
-import pygetwindow as gw
-import pyautogui
 import time
 import os
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from replay_bench import recorder_from_env
+
 
 # -------------------------
 #     Load Configurations
 # -------------------------
 load_dotenv()
+script_dir = os.path.dirname(os.path.abspath(__file__))
+folderpath = script_dir
 config = configparser.ConfigParser()
-config.read('configurations.ini')
+config.read(os.path.join(script_dir, 'configurations.ini'))
 url = "https://www.coles.com.au"
 delay = int(config.get('Coles', 'DelaySeconds'))
-script_dir = os.path.dirname(os.path.abspath(__file__))
-folderpath = script_dir
+
+# Saves raw API pages for offline replay when SCRAPER_RECORD_FIXTURES is set
+recorder = recorder_from_env("coles")
 
 
 # ---------------------------------------------------------------------------------------------------
@@ -44,6 +49,9 @@ folderpath = script_dir
 # ---------------------------------------------------------------------------------------------------
 
 def click_hcaptcha_checkbox_locked():
+    # Imported here so the parsing helpers can be used on machines without a display
+    import pyautogui
+
     # Click on center of checkbox
     pyautogui.moveTo(785, 505, duration=0.4)
     pyautogui.click()
@@ -400,142 +408,149 @@ def fetch_main_categories_from_browse_api(session, build_id):
 
 # ----------------------------------- START SCRAPING SESSION  ----------------------------------------------------------- #
 
-# Launch the home page of Coles and get session credentials
-driver, session = home_page_launch()
+def main():
+    # Launch the home page of Coles and get session credentials
+    driver, session = home_page_launch()
 
-# Extract build id from the Coles website. If Coles changes their approach in webpage just obtain their build id from website
-# manually and hardcode below for debugging and modify the respective function
-try:
-    WebDriverWait(driver, 15).until(
-        EC.presence_of_element_located((By.ID, "__NEXT_DATA__"))
-    )
-    build_id = extract_build_id(driver)
-except Exception as e:
-    print("__NEXT_DATA__ did not load — probably still blocked.")
-    driver.quit()
-    exit(1)
-
-# Following are the full categories list that will be returned for a particular store
-# We need to filter the categories we do not need for a particular scraping run after this
-
-categories_to_scrape_raw = fetch_main_categories_from_browse_api(session, build_id)
-
-# Filter Categories --- Specify the categories to exclude below
-excluded_slugs = {"specials", "liquorland", "tobacco", "pet-essentials"}
-
-# --- Print all the categories extracted dynamically from the API for the particular store ---
-print(f"\n Categories extracted from for store is ({len(categories_to_scrape_raw)} total):")
-for name, token in categories_to_scrape_raw.items():
-    print(f" - {name}: {token}")
-
-# Build the finalized list of categories to scrape after excluding the irrelevant categories
-categories_to_scrape = {
-    name: token
-    for name, token in categories_to_scrape_raw.items()
-    if token not in excluded_slugs
-}
-
-# Print excluded categories
-print(f"\nCategories excluded ({len(excluded_slugs)}):")
-for name in excluded_slugs:
-    print(f" {name}")
-
-# Print the categories that are being scraped  
-print(f"\nReady to scrape {len(categories_to_scrape)} categories:")
-for name, token in categories_to_scrape.items():
-    print(f" - {name}: {token}")
-
-# --- Start Scraping and Loop Through All the Selected Categories ---
-all_data = []
-
-for label, slug in categories_to_scrape.items():
-    print(f"\n Scraping category: {label} ({slug})")
-    page = 1
-    retry_count = 0
-    max_retries = 3
-
-    while True:
-        time.sleep(random.uniform(2, 3))
-        print(f" Fetching page {page}...")
-        data = fetch_category_page(session, build_id, slug, page)
-       
-        if data == "notFound":
-            print(f"Skipping '{label}' — category not available.")
-            break
+    # Extract build id from the Coles website. If Coles changes their approach in webpage just obtain their build id from website
+    # manually and hardcode below for debugging and modify the respective function
+    try:
+        WebDriverWait(driver, 15).until(
+            EC.presence_of_element_located((By.ID, "__NEXT_DATA__"))
+        )
+        build_id = extract_build_id(driver)
+    except Exception as e:
+        print("__NEXT_DATA__ did not load — probably still blocked.")
+        driver.quit()
+        exit(1)
 
-        elif data == "blocked" or data == "serverError":
-            # When a new browser is started, we need to go to Coles again, solve CAPTCHA challenge if given,
-            # and set the sesssion again before moving on with the further scraping
-            retry_count += 1
+    # Following are the full categories list that will be returned for a particular store
+    # We need to filter the categories we do not need for a particular scraping run after this
 
-            if retry_count > max_retries:
-                print(f"Max retries exceeded for {label} page {page}. Skipping to next category.")
+    categories_to_scrape_raw = fetch_main_categories_from_browse_api(session, build_id)
+
+    # Filter Categories --- Specify the categories to exclude below
+    excluded_slugs = {"specials", "liquorland", "tobacco", "pet-essentials"}
+
+    # --- Print all the categories extracted dynamically from the API for the particular store ---
+    print(f"\n Categories extracted from for store is ({len(categories_to_scrape_raw)} total):")
+    for name, token in categories_to_scrape_raw.items():
+        print(f" - {name}: {token}")
+
+    # Build the finalized list of categories to scrape after excluding the irrelevant categories
+    categories_to_scrape = {
+        name: token
+        for name, token in categories_to_scrape_raw.items()
+        if token not in excluded_slugs
+    }
+
+    # Print excluded categories
+    print(f"\nCategories excluded ({len(excluded_slugs)}):")
+    for name in excluded_slugs:
+        print(f" {name}")
+
+    # Print the categories that are being scraped  
+    print(f"\nReady to scrape {len(categories_to_scrape)} categories:")
+    for name, token in categories_to_scrape.items():
+        print(f" - {name}: {token}")
+
+    # --- Start Scraping and Loop Through All the Selected Categories ---
+    all_data = []
+
+    for label, slug in categories_to_scrape.items():
+        print(f"\n Scraping category: {label} ({slug})")
+        page = 1
+        retry_count = 0
+        max_retries = 3
+
+        while True:
+            time.sleep(random.uniform(2, 3))
+            print(f" Fetching page {page}...")
+            data = fetch_category_page(session, build_id, slug, page)
+
+            if data == "notFound":
+                print(f"Skipping '{label}' — category not available.")
                 break
-           
-            print(f"Blocked while accessing '{label}'. Reinitializing browser and session...")
-            driver.quit()
-            #Start new session
-            driver, session = home_page_launch()
-            continue  # Retry same page with new browser/session
 
-        elif data == "schemaError":
-            print(f" COLES API structure possibly changed for category '{label}'. Manual inspection required.")
-            break
+            elif data == "blocked" or data == "serverError":
+                # When a new browser is started, we need to go to Coles again, solve CAPTCHA challenge if given,
+                # and set the sesssion again before moving on with the further scraping
+                retry_count += 1
 
-        elif data is None:
-            print(f" Unexpected error while fetching '{label}' page {page}. Skipping category.")
-            break
+                if retry_count > max_retries:
+                    print(f"Max retries exceeded for {label} page {page}. Skipping to next category.")
+                    break
 
-        # Proceed to parse the data if it’s valid
-        products = parse_product_data(data, slug)
+                print(f"Blocked while accessing '{label}'. Reinitializing browser and session...")
+                driver.quit()
+                #Start new session
+                driver, session = home_page_launch()
+                continue  # Retry same page with new browser/session
 
-        if not products:
-            print(" No more products on this page.")
-            break
+            elif data == "schemaError":
+                print(f" COLES API structure possibly changed for category '{label}'. Manual inspection required.")
+                break
 
-        # Continue saving the products data
-        all_data.extend(products)
-        page += 1
+            elif data is None:
+                print(f" Unexpected error while fetching '{label}' page {page}. Skipping category.")
+                break
+
+            # Proceed to parse the data if it’s valid
+            if recorder:
+                recorder.record(json.dumps(data), ext="json", category=slug, page=page)
+            products = parse_product_data(data, slug)
+
+            if not products:
+                print(" No more products on this page.")
+                break
 
-        time.sleep(random.uniform(2, 3)) # !IMPORTANT: Slow down between requests not to throttle the API gateway
+            # Continue saving the products data
+            all_data.extend(products)
+            page += 1
 
-# Get a timestamp that we use to save each scraping runs
-now = datetime.now()
-date_str = now.strftime("%Y-%m-%d")
-time_str = now.strftime("%H%M")
+            time.sleep(random.uniform(2, 3)) # !IMPORTANT: Slow down between requests not to throttle the API gateway
 
-supermarket_name = config.get('Coles', 'SupermarketName', fallback='coles')
-location = config.get('Coles', 'Location', fallback='unknownloc')
+    # Get a timestamp that we use to save each scraping runs
+    now = datetime.now()
+    date_str = now.strftime("%Y-%m-%d")
+    time_str = now.strftime("%H%M")
 
-filename = f"{supermarket_name}_{location}_{date_str}_{time_str}.json"
+    supermarket_name = config.get('Coles', 'SupermarketName', fallback='coles')
+    location = config.get('Coles', 'Location', fallback='unknownloc')
 
-# Save the scraped data to a file in local computer
-filepath = os.path.join(folderpath, filename)
+    filename = f"{supermarket_name}_{location}_{date_str}_{time_str}.json"
 
-with open(filepath, 'w', encoding='utf-8') as f:
-    json.dump(all_data, f, ensure_ascii=False, indent=4)
+    # Save the scraped data to a file in local computer
+    filepath = os.path.join(folderpath, filename)
 
-# --- MongoDB Config ---
-username = os.getenv("MONGO_USERNAME")
-password = os.getenv("MONGO_PASSWORD")
-cluster = os.getenv("MONGO_CLUSTER")
-appname = os.getenv("MONGO_APPNAME")
-db_name = os.getenv("MONGO_DB")
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(all_data, f, ensure_ascii=False, indent=4)
 
-# Save the scraped data to the MongoDB database
-# --- Build Mongo URI ---
-mongo_uri = f"mongodb+srv://{username}:{password}@{cluster}/?retryWrites=true&w=majority&appName={appname}"
+    # --- MongoDB Config ---
+    username = os.getenv("MONGO_USERNAME")
+    password = os.getenv("MONGO_PASSWORD")
+    cluster = os.getenv("MONGO_CLUSTER")
+    appname = os.getenv("MONGO_APPNAME")
+    db_name = os.getenv("MONGO_DB")
 
-# --- Connect and Insert ---
-client = MongoClient(mongo_uri)
-db = client[db_name]
+    # Save the scraped data to the MongoDB database
+    # --- Build Mongo URI ---
+    mongo_uri = f"mongodb+srv://{username}:{password}@{cluster}/?retryWrites=true&w=majority&appName={appname}"
 
-collection_name = filename.replace(".json", "").replace("-", "_")
-collection = db[collection_name]
+    # --- Connect and Insert ---
+    client = MongoClient(mongo_uri)
+    db = client[db_name]
+
+    collection_name = filename.replace(".json", "").replace("-", "_")
+    collection = db[collection_name]
+
+    collection.insert_many(all_data)
+    client.close()
+
+    # Scraping Completed
+    driver.quit()
+    print(f"SUCCESS: Scraped and saved {len(all_data)} products from all selected categories.")
 
-collection.insert_many(all_data)
-client.close()
 
-# Scraping Completed
-driver.quit()
-print(f"SUCCESS: Scraped and saved {len(all_data)} products from all selected categories.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
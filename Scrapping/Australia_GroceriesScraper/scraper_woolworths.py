@@ -11,9 +11,11 @@ from urllib.parse import quote_plus
 import time
 import os
 import sys
-from bs4 import BeautifulSoup  # Ensure BeautifulSoup is imported
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from html_parsing import make_soup, strainer, PRODUCT_GRIDS
+
 # Initialize the WebDriver
 def initialize_driver():
     options = webdriver.ChromeOptions()
@@ -121,8 +123,8 @@ def scrape_woolworths(collection):
     driver.find_element(By.XPATH, "//button[@class='wx-header__drawer-button browseMenuDesktop']").click()
     time.sleep(delay)
     
-    # Parse the page content
-    page_contents = BeautifulSoup(driver.page_source, "html.parser")
+    # Parse only the category links out of the page content
+    page_contents = make_soup(driver.page_source, parse_only=strainer("a", "item ng-star-inserted"))
     
     # Find all product categories on the page
     categories = page_contents.find_all("a", class_="item ng-star-inserted")
@@ -163,9 +165,6 @@ def scrape_woolworths(collection):
         safe_get_url(driver, category_link + "?pageNumber=1&sortBy=TraderRelevance&filter=SoldBy(Woolworths)")
         time.sleep(delay)
 
-        # Parse page content
-        page_contents = BeautifulSoup(driver.page_source, "html.parser")
-
         # Get the number of pages in this category
         try:
             pageselement = driver.find_element(By.XPATH, "//span[@class='page-count']")
@@ -177,14 +176,14 @@ def scrape_woolworths(collection):
 
         for page in range(first_page, total_pages + 1):
 
-            # Scrape products on the page
-            page_contents = BeautifulSoup(driver.page_source, "html.parser")
+            # Scrape products on the page - only the product grid subtree is parsed
+            page_contents = make_soup(driver.page_source, parse_only=PRODUCT_GRIDS["woolworths"])
             productsgrid = page_contents.find("shared-grid", class_="grid-v2")
 
             if productsgrid is None:
                 print("Waiting Longer....")
                 time.sleep(delay)
-                page_contents = BeautifulSoup(driver.page_source, "html.parser")
+                page_contents = make_soup(driver.page_source, parse_only=PRODUCT_GRIDS["woolworths"])
                 productsgrid = page_contents.find("shared-grid", class_="grid-v2")
 
             products = driver.find_elements(By.XPATH, "//wc-product-tile[@class='ng-star-inserted']")
@@ -0,0 +1,121 @@
+"""
+Packed tile archives: one file per catalogue instead of one JPEG per tile.
+
+<slug>.tiles holds the JPEG bytes of every tile back to back and
+<slug>.tiles.json maps each tile key to its (offset, length). TileArchive
+memory-maps the archive, so reading a tile is a zero-copy slice.
+
+    archive = TileArchive("exported_tiles/coles/2025/coles-catalogue-....tiles")
+    for key in archive:
+        image = archive.decode(key)     # numpy BGR image
+        raw = archive.tile(key)         # memoryview of the JPEG bytes
+"""
+
+import json
+import mmap
+import os
+
+
+def index_path_for(archive_path):
+    return archive_path + ".json"
+
+
+def _load_index(archive_path):
+    try:
+        with open(index_path_for(archive_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+class TileArchiveWriter:
+    """
+    Appends encoded tiles to a catalogue's archive; the index is written by flush() and close().
+    Reopening an existing archive appends to it, so later runs add new pages
+    """
+
+    def __init__(self, archive_path):
+        self.path = archive_path
+        os.makedirs(os.path.dirname(archive_path) or ".", exist_ok=True)
+        self.index = _load_index(archive_path)
+        self.file = open(archive_path, "ab")
+        # Anything past the last indexed tile is from an interrupted run and is overwritten
+        end = max((offset + length for offset, length in self.index.values()), default=0)
+        self.file.truncate(end)
+        self.file.seek(end)
+
+    def add(self, key, data):
+        """
+        Append one tile's encoded bytes; returns (offset, length)
+        """
+        offset = self.file.tell()
+        self.file.write(data)
+        self.index[key] = [offset, len(data)]
+        return offset, len(data)
+
+    def flush(self):
+        """
+        Make every tile added so far readable: the bytes reach disk before the index names them
+        """
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        tmp_path = index_path_for(self.path) + ".part"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, index_path_for(self.path))
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class TileArchive:
+    """
+    Read-only, memory-mapped view of a packed tile archive
+    """
+
+    def __init__(self, archive_path):
+        self.path = archive_path
+        self.index = _load_index(archive_path)
+        self._file = open(archive_path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(archive_path) else None
+        self._view = memoryview(self._mmap) if self._mmap else memoryview(b"")
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def tile(self, key):
+        """
+        JPEG bytes of one tile as a memoryview into the mapped file (no copy)
+        """
+        offset, length = self.index[key]
+        return self._view[offset:offset + length]
+
+    def decode(self, key):
+        import cv2
+        import numpy as np
+        return cv2.imdecode(np.frombuffer(self.tile(key), dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    def close(self):
+        self._view.release()
+        if self._mmap:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_tile(page_path, box):
+    """
+    Crop a tile stored as coordinates straight from its source page
+    """
+    import cv2
+    x1, y1, x2, y2 = box
+    return cv2.imread(page_path)[y1:y2, x1:x2]
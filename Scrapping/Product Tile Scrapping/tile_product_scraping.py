@@ -5,66 +5,450 @@ Automatically generated by Colab.
 
 Original file is located at
     https://colab.research.google.com/drive/1kCX32Ntf02nGYnCANd_QqS-g4sWntHJi
+
+Batch tile extraction over the catalogue archive produced by CatalogueDownloader
+(catalogues/<store>/<year>/<slug>/page_NNN.jpg). Pages are decoded by worker
+threads ahead of inference, YOLO predicts a batch of pages at a time on CPU and
+crops are written by another pool while the next batch is running. Every page
+is recorded in <output>/manifest.jsonl with its tiles, boxes and confidences.
+
+By default tiles are stored only as boxes on their source page (read them with
+tile_archive.read_tile). --tile-storage packed writes one <slug>.tiles archive
+per catalogue with an offset index, read zero-copy through tile_archive.TileArchive;
+--tile-storage files keeps the old one-JPEG-per-tile output.
+
+Detections are also kept in an index next to catalogue_tracking.csv, keyed by
+page sha256 and weights sha256, so reruns only send new or changed pages (or
+every page after a weights change) through the model. --force ignores it.
+A page identical to one already detected (e.g. the same page in several state
+catalogues) is recorded as an alias of it, with the same tiles.
+
+    python tile_product_scraping.py --catalogues ../../Catalogue_Scraping_2025/catalogues --weights weights.pt
+    python tile_product_scraping.py --store coles --year 2025 --batch-size 8
 """
 
-pip install ultralytics opencv-python
+# Requirements: pip install ultralytics opencv-python
 
+import argparse
+import hashlib
+import json
 import os
+import sqlite3
+import time
+from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 from ultralytics import YOLO
 
+from tile_archive import TileArchiveWriter
+
 # ------------------------
 # Configuration
 # ------------------------
 MODEL_PATH = "weights.pt"          # your YOLOv8 weights
-IMAGE_PATH = "page_006.jpg"     # catalogue page image
+CATALOGUES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Catalogue_Scraping_2025", "catalogues")
 OUTPUT_DIR = "exported_tiles"
 IMG_SIZE = 640
 CONF_THRESHOLD = 0.25
+BATCH_SIZE = 8                     # pages per model.predict call
+PREFETCH_BATCHES = 2               # batches decoded ahead of inference
+INDEX_PATH = os.path.join(CATALOGUES_DIR, "..", "catalogue_data", "tile_detections.sqlite")
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # ------------------------
-# Load model
+# Detection index
 # ------------------------
-model = YOLO(MODEL_PATH)
+class DetectionIndex:
+    """
+    Detections per (page sha256, weights sha256), stored in SQLite
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS detections ("
+            "page_sha256 TEXT, weights_sha256 TEXT, page_path TEXT, detected_at TEXT, tiles TEXT, "
+            "PRIMARY KEY (page_sha256, weights_sha256))"
+        )
+        # Every page path recorded, including aliases of identical pages
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS page_paths ("
+            "page_path TEXT, weights_sha256 TEXT, page_sha256 TEXT, alias_of TEXT, "
+            "PRIMARY KEY (page_path, weights_sha256))"
+        )
+        self.conn.commit()
+
+    def known(self, weights_sha256):
+        """
+        Page hashes already processed with these weights
+        """
+        rows = self.conn.execute(
+            "SELECT page_sha256 FROM detections WHERE weights_sha256 = ?", (weights_sha256,)
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def known_paths(self, weights_sha256):
+        """
+        {page_path: page_sha256} of pages already recorded with these weights
+        """
+        rows = self.conn.execute(
+            "SELECT page_path, page_sha256 FROM detections WHERE weights_sha256 = ? "
+            "UNION ALL SELECT page_path, page_sha256 FROM page_paths WHERE weights_sha256 = ?",
+            (weights_sha256, weights_sha256)
+        ).fetchall()
+        return dict(rows)
+
+    def alias_target(self, page_sha256, weights_sha256):
+        """
+        Path of the page that was actually detected for this content
+        """
+        row = self.conn.execute(
+            "SELECT page_path FROM detections WHERE page_sha256 = ? AND weights_sha256 = ?",
+            (page_sha256, weights_sha256)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get(self, page_sha256, weights_sha256):
+        row = self.conn.execute(
+            "SELECT tiles FROM detections WHERE page_sha256 = ? AND weights_sha256 = ?",
+            (page_sha256, weights_sha256)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_many(self, rows, aliases=()):
+        """
+        rows: (page_sha256, weights_sha256, page_path, tiles)
+        aliases: (page_sha256, weights_sha256, page_path, alias_of) for identical pages
+        """
+        detected_at = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO detections VALUES (?, ?, ?, ?, ?)",
+                [(page, weights, path, detected_at, json.dumps(tiles)) for page, weights, path, tiles in rows]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO page_paths VALUES (?, ?, ?, ?)",
+                [(path, weights, page, None) for page, weights, path, _ in rows]
+                + [(path, weights, page, alias_of) for page, weights, path, alias_of in aliases]
+            )
+
+    def close(self):
+        self.conn.close()
+
 
 # ------------------------
-# Run inference
+# Catalogue pages
 # ------------------------
-results = model.predict(
-    source=IMAGE_PATH,
-    imgsz=IMG_SIZE,
-    conf=CONF_THRESHOLD,
-    verbose=False
-)
+def iter_pages(catalogues_dir, store=None, year=None):
+    """
+    Yield (store, year, slug, page_path) for every page in the catalogue tree
+    """
+    for store_name in sorted(os.listdir(catalogues_dir)):
+        store_dir = os.path.join(catalogues_dir, store_name)
+        # .blobs holds the de-duplicated page content, not catalogues
+        if store_name.startswith(".") or not os.path.isdir(store_dir) or (store and store_name != store):
+            continue
+        for year_name in sorted(os.listdir(store_dir)):
+            year_dir = os.path.join(store_dir, year_name)
+            if not os.path.isdir(year_dir) or (year and year_name != str(year)):
+                continue
+            for slug in sorted(os.listdir(year_dir)):
+                slug_dir = os.path.join(year_dir, slug)
+                if not os.path.isdir(slug_dir):
+                    continue
+                for name in sorted(os.listdir(slug_dir)):
+                    if name.startswith("page_") and name.endswith(".jpg"):
+                        yield store_name, year_name, slug, os.path.join(slug_dir, name)
+
+
+class PageHashes:
+    """
+    sha256 of each page, read from the catalogue's metadata.json when the
+    downloader recorded it and the size still matches, otherwise hashed
+    """
+
+    def __init__(self):
+        self._metadata = {}
+
+    def __call__(self, page_path):
+        folder, name = os.path.split(page_path)
+        if folder not in self._metadata:
+            try:
+                with open(os.path.join(folder, "metadata.json"), "r", encoding="utf-8") as f:
+                    self._metadata[folder] = json.load(f).get("pages", {})
+            except (OSError, ValueError):
+                self._metadata[folder] = {}
+        record = self._metadata[folder].get(name)
+        if record and record.get("sha256") and record.get("bytes") == os.path.getsize(page_path):
+            return record["sha256"]
+        return file_sha256(page_path)
+
+
+def decode_batch(pool, batch):
+    return [pool.submit(cv2.imread, page[3]) for page in batch]
 
-result = results[0]
-image = cv2.imread(IMAGE_PATH)
 
 # ------------------------
-# Export each detected tile
+# Export detected tiles
 # ------------------------
-for i, box in enumerate(result.boxes):
-    # Bounding box coordinates
-    x1, y1, x2, y2 = map(int, box.xyxy[0])
+def encode_jpeg(crop):
+    ok, data = cv2.imencode(".jpg", crop)
+    if not ok:
+        raise ValueError("could not encode tile")
+    return data.tobytes()
+
+
+def export_tiles(result, image, page, names, args, write_pool, write_futures, packed):
+    """
+    Record each detected tile and, depending on --tile-storage, queue it for writing:
+      coords - nothing written, the tile is its box on the source page (read_tile)
+      packed - JPEG-encoded in the pool and appended to the catalogue's archive
+      files  - one JPEG per tile
+    Returns the manifest entries for the page's tiles
+    """
+    store, year, slug, page_path = page
+    page_name = os.path.splitext(os.path.basename(page_path))[0]
+    tile_dir = os.path.join(args.output, store, year, slug)
+    if args.tile_storage == "files":
+        os.makedirs(tile_dir, exist_ok=True)
+
+    tiles = []
+    boxes = result.boxes
+    for i, (xyxy, cls, conf) in enumerate(zip(boxes.xyxy.tolist(), boxes.cls.tolist(), boxes.conf.tolist())):
+        # Bounding box coordinates
+        x1, y1, x2, y2 = map(int, xyxy)
+
+        # Crop image
+        crop = image[y1:y2, x1:x2]
+
+        if crop.size == 0:
+            continue
+
+        # Class and confidence
+        class_name = names[int(cls)]
+        confidence = float(conf)
+
+        tile = {
+            "key": f"{page_name}_{i:03d}",
+            "class": class_name,
+            "confidence": round(confidence, 4),
+            "box": [x1, y1, x2, y2],
+        }
+
+        # The crop is a view, so the page stays in memory until its tiles are written
+        if args.tile_storage == "files":
+            filename = f"{page_name}_{class_name}_{i:03d}_{confidence:.2f}.jpg"
+            output_path = os.path.join(tile_dir, filename)
+            write_futures.append(write_pool.submit(cv2.imwrite, output_path, crop))
+            tile["file"] = os.path.relpath(output_path, args.output)
+        elif args.tile_storage == "packed":
+            packed.append((tile_dir + ".tiles", tile, write_pool.submit(encode_jpeg, crop)))
+
+        tiles.append(tile)
+    return tiles
+
+
+def append_packed(packed, writers, output_dir):
+    """
+    Append the encoded tiles of a batch to their catalogue archives, in page order
+    """
+    for archive_path, tile, future in packed:
+        if archive_path not in writers:
+            writers[archive_path] = TileArchiveWriter(archive_path)
+        offset, length = writers[archive_path].add(tile["key"], future.result())
+        tile.update({"archive": os.path.relpath(archive_path, output_dir), "offset": offset, "length": length})
+
+
+def manifest_entry(page, tiles, alias_of=None):
+    entry = {
+        "store": page[0],
+        "year": page[1],
+        "slug": page[2],
+        "page": os.path.basename(page[3]),
+        "page_path": page[3],
+        "tiles": tiles,
+    }
+    if alias_of:
+        entry["alias_of"] = alias_of
+    return json.dumps(entry) + "\n"
+
+
+def close_writers(writers, keep=None):
+    """
+    Close archives of finished catalogues (pages arrive in catalogue order)
+    """
+    for archive_path in [path for path in writers if path != keep]:
+        writers.pop(archive_path).close()
+
+
+def run(args):
+    pages = list(iter_pages(args.catalogues, args.store, args.year))
+    if not pages:
+        print(f"No catalogue pages found under {args.catalogues}")
+        return
+
+    # Only pages whose content has not been through these weights need inference
+    index = DetectionIndex(args.index)
+    weights_sha256 = file_sha256(args.weights)
+    done = set() if args.force else index.known(weights_sha256)
+    recorded = {} if args.force else index.known_paths(weights_sha256)
+    page_hash = PageHashes()
+    todo, page_hashes, first_paths = [], {}, {}
+    known_aliases, aliases = [], {}
+    for page in pages:
+        sha256 = page_hash(page[3])
+        if recorded.get(page[3]) == sha256:
+            continue
+        page_hashes[page[3]] = sha256
+        # Identical pages (shared across state catalogues) are only detected once,
+        # the others are recorded as aliases of the first
+        if sha256 in done:
+            known_aliases.append(page)
+        elif sha256 in first_paths:
+            aliases.setdefault(sha256, []).append(page)
+        else:
+            first_paths[sha256] = page[3]
+            todo.append(page)
+    print(f"{len(pages)} pages, {len(pages) - len(todo)} already in the detection index or identical to another page")
+    pages = todo[:args.limit] if args.limit else todo
+
+    os.makedirs(args.output, exist_ok=True)
+    manifest_path = os.path.join(args.output, "manifest.jsonl")
+
+    if known_aliases:
+        # Same content as a page detected in an earlier run: reuse its tiles
+        with open(manifest_path, "a", encoding="utf-8") as manifest:
+            rows = []
+            for page in known_aliases:
+                sha256 = page_hashes[page[3]]
+                alias_of = index.alias_target(sha256, weights_sha256)
+                manifest.write(manifest_entry(page, index.get(sha256, weights_sha256), alias_of))
+                rows.append((sha256, weights_sha256, page[3], alias_of))
+        index.put_many([], rows)
+        print(f"{len(known_aliases)} pages recorded as aliases of pages already detected")
+
+    if not pages:
+        index.close()
+        return
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    # ------------------------
+    # Load model
+    # ------------------------
+    model = YOLO(args.weights)
+
+    batches = [pages[i:i + args.batch_size] for i in range(0, len(pages), args.batch_size)]
+    print(f"{len(pages)} pages in {len(batches)} batches of {args.batch_size}")
+
+    start = time.perf_counter()
+    tile_count = 0
+    with ThreadPoolExecutor(args.decode_workers, thread_name_prefix="decode") as decode_pool, \
+            ThreadPoolExecutor(args.write_workers, thread_name_prefix="write") as write_pool, \
+            open(manifest_path, "a", encoding="utf-8") as manifest:
+        # Decode the first batches while the model warms up
+        pending = deque(decode_batch(decode_pool, batch) for batch in batches[:PREFETCH_BATCHES])
+        write_futures = []
+        writers = {}
+
+        for batch_number, batch in enumerate(batches):
+            images = [future.result() for future in pending.popleft()]
+            if batch_number + PREFETCH_BATCHES < len(batches):
+                pending.append(decode_batch(decode_pool, batches[batch_number + PREFETCH_BATCHES]))
+
+            readable = [(page, image) for page, image in zip(batch, images) if image is not None]
+            for page, image in zip(batch, images):
+                if image is None:
+                    print(f"Could not read {page[3]} - skipping")
+
+            # ------------------------
+            # Run inference on the whole batch
+            # ------------------------
+            results = model.predict(
+                source=[image for _, image in readable],
+                imgsz=args.imgsz,
+                conf=args.conf,
+                device="cpu",
+                verbose=False
+            ) if readable else []
+
+            indexed, packed, page_tiles = [], [], []
+            for (page, image), result in zip(readable, results):
+                tiles = export_tiles(result, image, page, model.names, args, write_pool, write_futures, packed)
+                tile_count += len(tiles)
+                page_tiles.append((page, tiles))
+
+            if packed:
+                append_packed(packed, writers, args.output)
+                last = batch[-1]
+                close_writers(writers, keep=os.path.join(args.output, last[0], last[1], last[2]) + ".tiles")
+                # The manifest and detection index below point into the archive, so its
+                # index has to be on disk first or a killed run would skip these pages
+                for writer in writers.values():
+                    writer.flush()
+
+            alias_rows = []
+            for page, tiles in page_tiles:
+                sha256 = page_hashes[page[3]]
+                indexed.append((sha256, weights_sha256, page[3], tiles))
+                manifest.write(manifest_entry(page, tiles))
+                for alias in aliases.get(sha256, []):
+                    alias_rows.append((sha256, weights_sha256, alias[3], page[3]))
+                    manifest.write(manifest_entry(alias, tiles, page[3]))
+
+            index.put_many(indexed, alias_rows)
+
+            # Surface write errors and keep the queue of finished writes short
+            for future in [f for f in write_futures if f.done()]:
+                future.result()
+            write_futures = [f for f in write_futures if not f.done()]
+
+            elapsed = time.perf_counter() - start
+            processed = min((batch_number + 1) * args.batch_size, len(pages))
+            print(f"Batch {batch_number + 1}/{len(batches)}: {processed} pages, {tile_count} tiles, {processed / elapsed:.2f} pages/s")
+
+        for future in write_futures:
+            future.result()
+        close_writers(writers)
 
-    # Crop image
-    crop = image[y1:y2, x1:x2]
+    index.close()
 
-    if crop.size == 0:
-        continue
+    print(f"Tile export completed: {tile_count} tiles from {len(pages)} pages, manifest at {manifest_path}")
 
-    # Class and confidence
-    class_id = int(box.cls[0])
-    class_name = model.names[class_id]
-    confidence = float(box.conf[0])
 
-    # Output filename
-    filename = f"{class_name}_{i:03d}_{confidence:.2f}.jpg"
-    output_path = os.path.join(OUTPUT_DIR, filename)
+def main():
+    parser = argparse.ArgumentParser(description="Extract product tiles from downloaded catalogue pages")
+    parser.add_argument("--catalogues", default=CATALOGUES_DIR, help="catalogues/ folder from CatalogueDownloader")
+    parser.add_argument("--weights", default=MODEL_PATH)
+    parser.add_argument("--output", default=OUTPUT_DIR)
+    parser.add_argument("--store")
+    parser.add_argument("--year")
+    parser.add_argument("--limit", type=int, help="only process the first N new pages")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--imgsz", type=int, default=IMG_SIZE)
+    parser.add_argument("--conf", type=float, default=CONF_THRESHOLD)
+    parser.add_argument("--decode-workers", type=int, default=4)
+    parser.add_argument("--write-workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, help="torch CPU threads (default: torch's own choice)")
+    parser.add_argument("--index", default=INDEX_PATH, help="detection index (default: next to catalogue_tracking.csv)")
+    parser.add_argument("--force", action="store_true", help="re-run detection on pages already in the index")
+    parser.add_argument("--tile-storage", choices=["coords", "packed", "files"], default="coords",
+                        help="coords: boxes only (default), packed: one archive per catalogue, files: one JPEG per tile")
+    run(parser.parse_args())
 
-    # Save tile
-    cv2.imwrite(output_path, crop)
 
-print("Tile export completed")
+if __name__ == "__main__":
+    main()
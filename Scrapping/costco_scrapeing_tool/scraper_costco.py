@@ -2,10 +2,12 @@ from pymongo.mongo_client import MongoClient
 from pymongo.server_api import ServerApi
 from dotenv import load_dotenv
 from datetime import datetime
-import os, requests, sys, random, json
-import pandas as pd
+import os, requests, sys, random, json, asyncio
 from urllib.parse import quote_plus
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scrape_engine import CsvSink, ScrapeEngine
+
 
 consonants = "bcdfghjklmnpqrstvwxyz"
 vowels = "aeiou"
@@ -54,7 +56,6 @@ def safe_get(dictionary, keys, default=''):
     return current
 
 
-scraped_data = []
 base_url = 'https://www.costco.com.au/rest/v2/australia/products/search'
 
 headers = {
@@ -73,47 +74,51 @@ headers = {
     "user-agent": get_fake_user_agent()
 }
 
-
-page = 1
-while True:
-    print(page)
-    query_params = {
-        "fields": "FULL",
-        "query": "",
-        "pageSize": 48,
-        "category": "hot-buys",
-        "lang": "en_AU",
-        "curr": "AUD"
+def map_product(product):
+    """
+    Map one product from the search API onto the output row
+    """
+    return {
+        'name': product.get('englishName', 'N/A'),
+        'value': safe_get(product, ['price', 'value'], 0),
+        'product_link': 'https://www.costco.com.au' + product.get('url', 'N/A'),
+        'code': product.get('code', 'N/A'),
+        'averageRating': product.get('averageRating', 0),
+        'discount_value': safe_get(product, ['couponDiscount', 'discountValue'], 0),
+        'discount_end_date': product.get('discountEndDate', 'N/A'),
+        'discount_start_date': product.get('discountStartDate', 'N/A'),
+        'in_stock': product.get('stock', {}).get('stockLevelStatus', 'N/A'),
+        'images_link': ['https://www.costco.com.au' + img['url'] for img in product.get('images', [])]
     }
-    
-    if page > 1:
-        query_params.update({'currentPage': page-1})
-
-    print(query_params)
-    response = requests.get(base_url, headers=headers, params=query_params)
-    data = response.json()
-
-
-    for product in data['products']:
-        product_info = {
-            'name': product.get('englishName', 'N/A'),
-            'value': safe_get(product, ['price', 'value'], 0),
-            'product_link': 'https://www.costco.com.au' + product.get('url', 'N/A'),
-            'code': product.get('code', 'N/A'),
-            'averageRating': product.get('averageRating', 0),
-            'discount_value': safe_get(product, ['couponDiscount', 'discountValue'], 0),
-            'discount_end_date': product.get('discountEndDate', 'N/A'),
-            'discount_start_date': product.get('discountStartDate', 'N/A'),
-            'in_stock': product.get('stock', {}).get('stockLevelStatus', 'N/A'),
-            'images_link': ['https://www.costco.com.au' + img['url'] for img in product.get('images', [])]
-        }
-        scraped_data.append(product_info)
-
-    totalPages = data['pagination']['totalPages']
-    if page >= totalPages:
-        break
-    page += 1
-
-
-df = pd.DataFrame(scraped_data)
-df.to_csv('costco_products.csv', index=False)
\ No newline at end of file
+
+
+def parse_page(text):
+    """
+    Map every product on a search API page along with the total page count
+    """
+    data = json.loads(text)
+    rows = [map_product(product) for product in data['products']]
+    return {'rows': rows, 'totalPages': data['pagination']['totalPages']}
+
+
+def scrape_hot_buys(output_path='costco_products.csv'):
+    """
+    Fetch every hot-buys page through the shared scrape engine and stream the
+    rows straight to CSV. The first response gives totalPages, the remaining
+    pages are then fetched concurrently over a pooled session within the
+    adapter's requests-per-second budget
+    """
+    from store_adapters import CostcoAdapter  # imports this module, so not at the top
+
+    adapter = CostcoAdapter()
+    sink = CsvSink(output_path, append=False, extra_fields=adapter.extra_fields)
+    try:
+        stats = asyncio.run(ScrapeEngine(adapter, sink, batch_size=200).run())
+    finally:
+        sink.close()
+    print(f"Saved {stats['records']} products from {stats['pages']} pages to {output_path} in {stats['seconds']}s")
+    return stats
+
+
+if __name__ == '__main__':
+    scrape_hot_buys()
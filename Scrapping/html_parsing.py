@@ -0,0 +1,140 @@
+"""
+Pluggable HTML parsing layer for the BeautifulSoup-based scrapers.
+
+make_soup() uses the compiled lxml parser when it is installed (falling back to
+html.parser) and can restrict parsing to the product-grid subtree with a
+SoupStrainer, so the rest of the page is never turned into Python objects.
+
+Override the parser with SCRAPER_HTML_PARSER=html.parser|lxml|html5lib.
+
+Benchmark the backends on saved fixture pages:
+    python html_parsing.py fixtures/drake --grid drake --repeat 5
+"""
+
+import argparse
+import glob
+import os
+import re
+import time
+from typing import Callable, Dict, List, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    from selectolax.parser import HTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    HAS_SELECTOLAX = False
+
+DEFAULT_PARSER = os.getenv("SCRAPER_HTML_PARSER") or ("lxml" if HAS_LXML else "html.parser")
+
+# Product-grid subtree for each scraper: (tag, class) used for both SoupStrainer and CSS
+GRID_SELECTORS = {
+    "drake": (None, "TalkerGrid__Item"),
+    "foodland": ("div", "TalkerGrid__Item"),
+    "adelaidesfinest": ("div", "results-grid__result"),
+    "woolworths": ("shared-grid", "grid-v2"),
+}
+
+
+def strainer(tag: Optional[str], css_class: str) -> SoupStrainer:
+    """
+    SoupStrainer for elements carrying css_class. The class attribute is matched
+    as a whole-word regex because it is still an unsplit string while straining
+    """
+    class_pattern = re.compile(rf"(^|\s){re.escape(css_class)}(\s|$)")
+    if tag:
+        return SoupStrainer(tag, class_=class_pattern)
+    return SoupStrainer(class_=class_pattern)
+
+
+PRODUCT_GRIDS: Dict[str, SoupStrainer] = {
+    name: strainer(tag, css_class) for name, (tag, css_class) in GRID_SELECTORS.items()
+}
+
+
+def make_soup(markup: str, parse_only: Optional[SoupStrainer] = None, parser: Optional[str] = None) -> BeautifulSoup:
+    """
+    Parse markup with the fastest available backend, optionally only the matching subtree
+    """
+    return BeautifulSoup(markup, parser or DEFAULT_PARSER, parse_only=parse_only)
+
+
+def css_for(grid: str) -> str:
+    tag, css_class = GRID_SELECTORS[grid]
+    return f"{tag or ''}.{css_class}"
+
+
+def _backends(grid: str) -> Dict[str, Callable[[str], int]]:
+    """
+    Each backend parses a page and returns the number of product-grid matches,
+    so the counts double as a check that the backends agree
+    """
+    selector = css_for(grid)
+    grid_strainer = PRODUCT_GRIDS[grid]
+    backends = {
+        "html.parser": lambda html: len(BeautifulSoup(html, "html.parser").select(selector)),
+    }
+    if HAS_LXML:
+        backends["lxml"] = lambda html: len(BeautifulSoup(html, "lxml").select(selector))
+        backends["lxml+strainer"] = lambda html: len(
+            BeautifulSoup(html, "lxml", parse_only=grid_strainer).select(selector)
+        )
+    if HAS_SELECTOLAX:
+        backends["selectolax"] = lambda html: len(HTMLParser(html).css(selector))
+    return backends
+
+
+def benchmark(pages: List[str], grid: str, repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """
+    Time every available backend over the given page sources (best of `repeat`)
+    """
+    results = {}
+    for name, parse in _backends(grid).items():
+        best = float("inf")
+        matches = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            matches = sum(parse(html) for html in pages)
+            best = min(best, time.perf_counter() - start)
+        results[name] = {
+            "seconds": best,
+            "ms_per_page": best * 1000 / max(len(pages), 1),
+            "matches": matches,
+        }
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Compare HTML parsing backends on saved pages")
+    arg_parser.add_argument("fixtures", help="Folder of saved .html page sources")
+    arg_parser.add_argument("--grid", choices=sorted(GRID_SELECTORS), required=True)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.fixtures, "*.html")))
+    if not paths:
+        raise SystemExit(f"No .html fixtures found in {args.fixtures}")
+    pages = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append(f.read())
+
+    print(f"{len(pages)} pages, grid '{css_for(args.grid)}', best of {args.repeat}")
+    baseline = None
+    for name, stats in benchmark(pages, args.grid, args.repeat).items():
+        baseline = baseline or stats["seconds"]
+        print(
+            f"  {name:<15} {stats['ms_per_page']:8.2f} ms/page  "
+            f"x{baseline / stats['seconds']:5.1f}  matches={stats['matches']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
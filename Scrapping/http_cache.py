@@ -0,0 +1,202 @@
+"""
+Shared HTTP layer with an on-disk response cache for the requests-based scrapers.
+
+Pages that send ETag/Last-Modified are revalidated with a conditional GET, so an
+unchanged page costs a 304 and no body transfer. Pages without validators are
+served straight from disk until their TTL expires. Parsed records are memoised
+next to the body, keyed by the body hash, so unchanged pages are not re-parsed.
+
+Configuration (environment, optional):
+    SCRAPER_CACHE_DIR  - cache folder (default: Scrapping/.http_cache)
+    SCRAPER_CACHE_TTL  - seconds to trust a page that has no validators (default: 6h)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "SCRAPER_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".http_cache"),
+)
+DEFAULT_TTL = int(os.getenv("SCRAPER_CACHE_TTL", 6 * 60 * 60))
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _atomic_write(path: str, data: str) -> None:
+    # Write to a temp file in the same folder and rename so readers never see half a file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    status_code: int
+    text: str
+    key: str
+    changed: bool  # False when the body is identical to the last stored copy
+    from_cache: bool  # True when the body was served from disk (304 or TTL hit)
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+class ResponseCache:
+    """
+    On-disk store of response bodies, validators and parsed records
+    Layout: <cache_dir>/<key>.json (metadata), <key>.body, <key>.parsed.json
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key_for(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        canonical = url
+        if params:
+            canonical += "?" + json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, key + suffix)
+
+    def load_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key, ".json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save_meta(self, key: str, meta: Dict[str, Any]) -> None:
+        _atomic_write(self._path(key, ".json"), json.dumps(meta))
+
+    def load_body(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key, ".body"), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def save_body(self, key: str, text: str) -> None:
+        _atomic_write(self._path(key, ".body"), text)
+
+    def parse_text(self, key: str, text: str, parse: Callable[[str], Any]) -> Any:
+        """
+        Return parse(text), reusing the stored result when the text has not changed
+        Parsed results must be JSON serialisable
+        """
+        digest = _sha256(text)
+        parsed_path = self._path(key, ".parsed.json")
+        try:
+            with open(parsed_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("sha256") == digest:
+                return stored["records"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+
+        records = parse(text)
+        _atomic_write(parsed_path, json.dumps({"sha256": digest, "records": records}, default=str))
+        return records
+
+
+class CachedSession:
+    """
+    requests.Session wrapper that serves GETs through a ResponseCache
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        ttl: int = DEFAULT_TTL,
+        headers: Optional[Dict[str, str]] = None,
+        session: Optional[requests.Session] = None,
+    ):
+        self.cache = ResponseCache(cache_dir)
+        self.ttl = ttl
+        self.session = session or requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 10,
+    ) -> CachedResponse:
+        key = self.cache.key_for(url, params)
+        meta = self.cache.load_meta(key)
+        body = self.cache.load_body(key) if meta else None
+        now = time.time()
+
+        request_headers = dict(headers or {})
+        if meta and body is not None:
+            has_validators = meta.get("etag") or meta.get("last_modified")
+            if not has_validators and now - meta.get("fetched_at", 0) < self.ttl:
+                return CachedResponse(meta.get("url", url), meta.get("status_code", 200), body, key,
+                                      changed=False, from_cache=True)
+            if meta.get("etag"):
+                request_headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request_headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = self.session.get(url, params=params, headers=request_headers, timeout=timeout)
+
+        if response.status_code == 304 and body is not None:
+            meta["fetched_at"] = now
+            self.cache.save_meta(key, meta)
+            return CachedResponse(response.url, meta.get("status_code", 200), body, key,
+                                  changed=False, from_cache=True)
+
+        text = response.text
+        if not response.ok:
+            return CachedResponse(response.url, response.status_code, text, key,
+                                  changed=True, from_cache=False)
+
+        digest = _sha256(text)
+        changed = not meta or meta.get("sha256") != digest or body is None
+        if changed:
+            self.cache.save_body(key, text)
+        self.cache.save_meta(key, {
+            "url": response.url,
+            "status_code": response.status_code,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": now,
+            "sha256": digest,
+        })
+        return CachedResponse(response.url, response.status_code, text, key,
+                              changed=changed, from_cache=False)
+
+    def parse(self, response: CachedResponse, parse: Callable[[str], Any]) -> Any:
+        """
+        Parse a response body, skipping the work when the page is unchanged
+        """
+        return self.cache.parse_text(response.key, response.text, parse)
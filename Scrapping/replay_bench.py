@@ -0,0 +1,217 @@
+"""
+Offline record/replay benchmark for the scrapers.
+
+Record: run any scraper with SCRAPER_RECORD_FIXTURES=<folder> and every HTTP
+response / page source it parses is saved to <folder>/<scraper>/ together with
+an index.jsonl describing each fixture (category, page, ...).
+
+Replay: run the scrapers' own parsing code against the recorded fixtures with no
+network or browser, and report pages/s, records/s and peak memory per scraper.
+    python replay_bench.py --fixtures fixtures
+    python replay_bench.py --fixtures fixtures --scraper drake coles --repeat 5
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from html_parsing import make_soup
+
+SCRAPPING_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURES_DIR = os.path.join(SCRAPPING_DIR, "fixtures")
+
+# Scrapers that live in sub-folders are imported from there
+for sub_dir in ("", "costco_scrapeing_tool", "Australia_GroceriesScraper"):
+    path = os.path.join(SCRAPPING_DIR, sub_dir)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+class FixtureRecorder:
+    """
+    Saves the raw pages a scraper parses so they can be replayed offline
+    """
+
+    def __init__(self, fixtures_dir: str, scraper: str):
+        self.folder = os.path.join(fixtures_dir, scraper)
+        os.makedirs(self.folder, exist_ok=True)
+        self._lock = threading.Lock()
+        self._count = len(_read_index(self.folder))
+
+    def record(self, text: str, ext: str = "html", **meta: Any) -> str:
+        with self._lock:
+            self._count += 1
+            file_name = f"{self._count:05d}.{ext}"
+            with open(os.path.join(self.folder, file_name), "w", encoding="utf-8") as f:
+                f.write(text)
+            with open(os.path.join(self.folder, "index.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps({"file": file_name, "meta": meta}, default=str) + "\n")
+        return file_name
+
+
+def recorder_from_env(scraper: str) -> Optional[FixtureRecorder]:
+    """
+    Recorder for the scraper when SCRAPER_RECORD_FIXTURES is set, otherwise None
+    """
+    fixtures_dir = os.getenv("SCRAPER_RECORD_FIXTURES")
+    return FixtureRecorder(fixtures_dir, scraper) if fixtures_dir else None
+
+
+def _read_index(folder: str) -> List[Dict[str, Any]]:
+    index_path = os.path.join(folder, "index.jsonl")
+    if not os.path.exists(index_path):
+        return []
+    with open(index_path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_fixtures(fixtures_dir: str, scraper: str) -> List[Dict[str, Any]]:
+    folder = os.path.join(fixtures_dir, scraper)
+    fixtures = []
+    for entry in _read_index(folder):
+        with open(os.path.join(folder, entry["file"]), "r", encoding="utf-8") as f:
+            fixtures.append({"text": f.read(), "meta": entry.get("meta", {})})
+    return fixtures
+
+
+class ReplayElement:
+    """
+    Stand-in for a Selenium WebElement backed by recorded outerHTML, covering
+    what parse_card uses: find_element (CSS selector / tag name), get_attribute, text
+    """
+
+    def __init__(self, tag):
+        self._tag = tag
+
+    @classmethod
+    def from_html(cls, html: str) -> "ReplayElement":
+        soup = make_soup(html)
+        return cls(soup.find(True) or soup)
+
+    def find_element(self, by: str, value: str) -> "ReplayElement":
+        if by == "css selector":
+            found = self._tag.select_one(value)
+        elif by == "tag name":
+            found = self._tag.find(value)
+        else:
+            raise NotImplementedError(f"Replay does not support locating by {by}")
+        if found is None:
+            raise LookupError(f"No element matching {by}={value}")
+        return ReplayElement(found)
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        value = self._tag.get(name)
+        return " ".join(value) if isinstance(value, list) else value
+
+    @property
+    def text(self) -> str:
+        return self._tag.get_text("\n", strip=True)
+
+
+# ------------------------------------------------------------------
+# Replayers: fixture -> list of records, using each scraper's own parser
+# ------------------------------------------------------------------
+
+def _replay_drake(fixture):
+    from scraper_drake import parse_products
+    return parse_products(fixture["text"], fixture["meta"].get("category", "N/A"))
+
+
+def _replay_foodland(fixture):
+    from scraper_foodland import parse_products
+    return parse_products(fixture["text"])
+
+
+def _replay_adelaidesfinest(fixture):
+    from scraper_adelaidesfinest import parse_products
+    return parse_products(fixture["text"])
+
+
+def _replay_costco(fixture):
+    from scraper_costco import parse_page
+    return parse_page(fixture["text"])["rows"]
+
+
+def _replay_coles(fixture):
+    from scraper_coles import parse_product_data
+    return parse_product_data(json.loads(fixture["text"]), fixture["meta"].get("category", ""))
+
+
+def _replay_iga(fixture):
+    from scraper_IGA_catalogue import parse_card
+    return [parse_card(ReplayElement.from_html(card_html)) for card_html in json.loads(fixture["text"])]
+
+
+REPLAYERS: Dict[str, Callable[[Dict[str, Any]], List[Dict[str, Any]]]] = {
+    "drake": _replay_drake,
+    "foodland": _replay_foodland,
+    "adelaidesfinest": _replay_adelaidesfinest,
+    "costco": _replay_costco,
+    "coles": _replay_coles,
+    "iga": _replay_iga,
+}
+
+
+def replay(scraper: str, fixtures: List[Dict[str, Any]], repeat: int = 3) -> Dict[str, float]:
+    """
+    Replay the fixtures through the scraper's parser
+    Timing is the best of `repeat` runs; peak memory comes from a separate
+    tracemalloc run so tracing overhead does not skew the throughput
+    """
+    replayer = REPLAYERS[scraper]
+    replayer(fixtures[0])  # import the scraper module outside the timed runs
+
+    best = float("inf")
+    records = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        records = sum(len(replayer(fixture)) for fixture in fixtures)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    for fixture in fixtures:
+        replayer(fixture)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "pages": len(fixtures),
+        "records": records,
+        "seconds": best,
+        "pages_per_s": len(fixtures) / best if best else 0.0,
+        "records_per_s": records / best if best else 0.0,
+        "peak_mib": peak / (1024 * 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded fixtures through the scraper parsers")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR)
+    parser.add_argument("--scraper", nargs="*", choices=sorted(REPLAYERS), default=sorted(REPLAYERS))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'scraper':<16}{'pages':>7}{'records':>9}{'pages/s':>10}{'records/s':>11}{'peak MiB':>10}")
+    for scraper in args.scraper:
+        fixtures = load_fixtures(args.fixtures, scraper)
+        if not fixtures:
+            print(f"{scraper:<16}  no fixtures in {os.path.join(args.fixtures, scraper)}")
+            continue
+        try:
+            stats = replay(scraper, fixtures, args.repeat)
+        except ImportError as e:
+            print(f"{scraper:<16}  skipped - {e}")
+            continue
+        print(
+            f"{scraper:<16}{stats['pages']:>7}{stats['records']:>9}"
+            f"{stats['pages_per_s']:>10.1f}{stats['records_per_s']:>11.1f}{stats['peak_mib']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
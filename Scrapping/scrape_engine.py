@@ -0,0 +1,436 @@
+"""
+Common asynchronous engine for the requests-based scrapers.
+
+A store is described by a small StoreAdapter (categories, page requests, page
+count, parse) and the engine supplies everything else once for every store:
+concurrent page fetches bounded per store, a requests-per-second budget,
+retries with exponential backoff, the on-disk HTTP cache, a resumable
+checkpoint and batched writes to CSV / JSON Lines / MongoDB. --resume skips the
+pages the checkpoint lists and appends to the file or collection the
+interrupted run was writing.
+
+Every record is normalised to CANONICAL_FIELDS so all stores share one schema,
+followed by any store-specific extra_fields its adapter declares.
+
+    python scrape_engine.py drake foodland --sink jsonl --out scraped
+    python scrape_engine.py foodland --sink mongo --resume
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_cache import DEFAULT_CACHE_DIR, CachedResponse, CachedSession
+from replay_bench import recorder_from_env
+
+# Shared output schema, the same fields Foodland and Adelaide's Finest already write
+CANONICAL_FIELDS = [
+    "store",
+    "product_code",
+    "category",
+    "item_name",
+    "item_price",
+    "best_price",
+    "unit_price",
+    "special_text",
+    "promo_text",
+    "link",
+    "scraped_at",
+]
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".scrape_checkpoint.json")
+
+
+def to_canonical(record: Dict[str, Any], store: str, scraped_at: str, extra_fields: Iterable[str] = ()) -> Dict[str, Any]:
+    row = {field: record.get(field, "N/A") for field in [*CANONICAL_FIELDS, *extra_fields]}
+    row["store"] = store
+    row["scraped_at"] = scraped_at
+    return row
+
+
+class StoreAdapter:
+    """
+    Describes one store to the engine. Subclasses set `name` and implement
+    page_request() and parse(); the rest have sensible defaults
+    """
+
+    name = "store"
+    headers: Dict[str, str] = {}
+    concurrency = 4  # pages in flight at once for this store
+    rate = 2.0  # requests per second across the store
+    max_retries = 5
+    timeout = 10
+    fixture_ext = "html"  # extension used when recording pages for replay_bench
+    extra_fields: List[str] = []  # store-specific columns written after CANONICAL_FIELDS
+
+    def categories(self) -> List[Optional[str]]:
+        # Stores without categories are scraped as a single listing
+        return [None]
+
+    def page_request(self, category: Optional[str], page: int) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        (url, params) for one page, pages start at 1
+        """
+        raise NotImplementedError
+
+    def total_pages(self, category: Optional[str], first_page: CachedResponse) -> Optional[int]:
+        """
+        Page count read from the first page, or None to keep going until an empty page
+        """
+        return None
+
+    def parse(self, text: str, category: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Records from one page, using CANONICAL_FIELDS and extra_fields names. Must be JSON serialisable
+        """
+        raise NotImplementedError
+
+
+class RateBudget:
+    """
+    Token bucket limiting requests per second, shared by all tasks of a store
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Checkpoint:
+    """
+    Pages already written to the sink, per store and category, and the sink
+    target (file path or collection) each store writes to, saved as JSON so an
+    interrupted run resumes where it stopped, into the same output
+    """
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT, resume: bool = True):
+        self.path = path
+        self.done: Dict[str, Dict[str, List[int]]] = {}
+        self.targets: Dict[str, Dict[str, str]] = {}
+        if resume and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            # Checkpoints written before targets were recorded only hold the pages
+            if set(data) == {"pages", "targets"}:
+                self.done, self.targets = data["pages"], data["targets"]
+            else:
+                self.done = data
+
+    def is_done(self, store: str, category: Optional[str], page: int) -> bool:
+        return page in self.done.get(store, {}).get(str(category), [])
+
+    def mark(self, pages: Iterable[Tuple[str, Optional[str], int]]) -> None:
+        for store, category, page in pages:
+            self.done.setdefault(store, {}).setdefault(str(category), []).append(page)
+        self.save()
+
+    def target(self, store: str, kind: str) -> Optional[str]:
+        return self.targets.get(store, {}).get(kind)
+
+    def set_target(self, store: str, kind: str, target: str) -> None:
+        self.targets.setdefault(store, {})[kind] = target
+        self.save()
+
+    def clear(self, store: str) -> None:
+        self.done.pop(store, None)
+        self.targets.pop(store, None)
+        self.save()
+
+    def save(self) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"pages": self.done, "targets": self.targets}, f)
+        os.replace(tmp_path, self.path)
+
+
+# ------------------------------------------------------------------
+# Sinks: receive batches of canonical rows
+# ------------------------------------------------------------------
+
+class JsonlSink:
+    def __init__(self, path: str):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        self.file.write("".join(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in rows))
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class CsvSink:
+    def __init__(self, path: str, append: bool = True, extra_fields: Iterable[str] = ()):
+        new_file = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, fieldnames=[*CANONICAL_FIELDS, *extra_fields])
+        if new_file:
+            self.writer.writeheader()
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class MongoSink:
+    """
+    Inserts batches into collection_name (make_sink names it <Store>_<timestamp>, like
+    the store scripts). Connection settings come from the same MONGO_* variables in .env
+    """
+
+    def __init__(self, collection_name: str):
+        from urllib.parse import quote_plus
+        from dotenv import load_dotenv
+        from pymongo.mongo_client import MongoClient
+
+        load_dotenv()
+        username = os.getenv("MONGO_USERNAME")
+        password = os.getenv("MONGO_PASSWORD")
+        cluster = os.getenv("MONGO_CLUSTER")
+        appname = os.getenv("MONGO_APPNAME")
+        db_name = os.getenv("MONGO_DB")
+
+        if not all([username, password, cluster, appname, db_name]):
+            raise ValueError("Missing MongoDB environment variables in .env")
+
+        uri = f"mongodb+srv://{quote_plus(username)}:{quote_plus(password)}@{cluster}/?retryWrites=true&w=majority&appName={appname}"
+        self.client = MongoClient(uri)
+        self.collection = self.client[db_name][collection_name]
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        # insert_many adds _id to the dicts, so hand it copies
+        self.collection.insert_many([dict(row) for row in rows], ordered=False)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+# ------------------------------------------------------------------
+# Engine
+# ------------------------------------------------------------------
+
+class ScrapeEngine:
+    """
+    Runs one adapter: categories in parallel, pages in parallel within the
+    store's concurrency and rate budget, rows written to the sink in batches.
+    The checkpoint only records a page once its rows have reached the sink
+    """
+
+    def __init__(
+        self,
+        adapter: StoreAdapter,
+        sink,
+        checkpoint: Optional[Checkpoint] = None,
+        batch_size: int = 500,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+    ):
+        self.adapter = adapter
+        self.sink = sink
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.scraped_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        session = requests.Session()
+        pool = HTTPAdapter(pool_connections=adapter.concurrency, pool_maxsize=adapter.concurrency)
+        session.mount("https://", pool)
+        session.mount("http://", pool)
+        self.http = CachedSession(cache_dir=cache_dir, headers=adapter.headers, session=session)
+
+        self.recorder = recorder_from_env(adapter.name)
+        self.limit = asyncio.Semaphore(adapter.concurrency)
+        self.budget = RateBudget(adapter.rate)
+        self._buffer: List[Dict[str, Any]] = []
+        self._pending: List[Tuple[str, Optional[str], int]] = []
+        self._write_lock = asyncio.Lock()
+        self.stats = {"pages": 0, "records": 0, "failed": 0, "skipped": 0}
+
+    async def fetch(self, category: Optional[str], page: int) -> Optional[CachedResponse]:
+        url, params = self.adapter.page_request(category, page)
+        for attempt in range(self.adapter.max_retries):
+            async with self.limit:
+                await self.budget.acquire()
+                try:
+                    response = await asyncio.to_thread(self.http.get, url, params, None, self.adapter.timeout)
+                    if response.status_code not in RETRY_STATUS:
+                        return response if response.ok else None
+                    print(f"[{self.adapter.name}] {category} page {page}: HTTP {response.status_code}")
+                except requests.exceptions.RequestException as e:
+                    print(f"[{self.adapter.name}] {category} page {page}: {e}")
+            # Exponential backoff with jitter, outside the semaphore so other pages keep going
+            await asyncio.sleep(min(60, 2 ** attempt) + random.uniform(0, 1))
+        print(f"[{self.adapter.name}] {category} page {page}: giving up after {self.adapter.max_retries} attempts")
+        self.stats["failed"] += 1
+        return None
+
+    async def parse(self, response: CachedResponse, category: Optional[str]) -> List[Dict[str, Any]]:
+        records = await asyncio.to_thread(
+            self.http.parse, response, lambda text: self.adapter.parse(text, category)
+        )
+        return [
+            to_canonical(record, self.adapter.name, self.scraped_at, self.adapter.extra_fields)
+            for record in records
+        ]
+
+    async def emit(self, rows: List[Dict[str, Any]], category: Optional[str], page: int) -> None:
+        async with self._write_lock:
+            self.stats["pages"] += 1
+            self.stats["records"] += len(rows)
+            self._buffer.extend(rows)
+            self._pending.append((self.adapter.name, category, page))
+            if len(self._buffer) >= self.batch_size:
+                await self._flush()
+
+    async def _flush(self) -> None:
+        if self._buffer:
+            await asyncio.to_thread(self.sink.write, self._buffer)
+        if self.checkpoint and self._pending:
+            self.checkpoint.mark(self._pending)
+        self._buffer, self._pending = [], []
+
+    async def scrape_page(
+        self, category: Optional[str], page: int, response: Optional[CachedResponse] = None
+    ) -> Optional[int]:
+        """
+        Fetch (unless given), parse and emit one page; returns the number of records,
+        -1 for a page the checkpoint already has, or None when the page could not be fetched
+        """
+        if self.checkpoint and self.checkpoint.is_done(self.adapter.name, category, page):
+            self.stats["skipped"] += 1
+            return -1
+        response = response or await self.fetch(category, page)
+        if response is None:
+            return None
+        if self.recorder:
+            self.recorder.record(response.text, ext=self.adapter.fixture_ext, category=category, page=page)
+        rows = await self.parse(response, category)
+        if rows:
+            await self.emit(rows, category, page)
+        return len(rows)
+
+    async def scrape_category(self, category: Optional[str]) -> None:
+        first = await self.fetch(category, 1)
+        if first is None:
+            return
+        total = self.adapter.total_pages(category, first)
+        if not await self.scrape_page(category, 1, first):
+            return
+
+        if total is not None:
+            # Page count is known, so every remaining page is scheduled up front
+            await asyncio.gather(*(self.scrape_page(category, page) for page in range(2, total + 1)))
+            return
+
+        # Open-ended listing: fetch a window of pages at a time until one comes back empty.
+        # A page that failed after its retries is skipped (and left out of the checkpoint,
+        # so --resume fetches it again) rather than taken as the end of the category
+        page = 2
+        while True:
+            window = range(page, page + self.adapter.concurrency)
+            counts = await asyncio.gather(*(self.scrape_page(category, p) for p in window))
+            if any(count == 0 for count in counts):
+                return
+            if all(count is None for count in counts):
+                print(f"[{self.adapter.name}] {category}: pages {window.start}-{window.stop - 1} all failed, stopping")
+                return
+            page += self.adapter.concurrency
+
+    async def run(self) -> Dict[str, int]:
+        start = time.perf_counter()
+        await asyncio.gather(*(self.scrape_category(category) for category in self.adapter.categories()))
+        async with self._write_lock:
+            await self._flush()
+        self.stats["seconds"] = round(time.perf_counter() - start, 2)
+        return self.stats
+
+
+def make_sink(
+    kind: str, store: str, out_dir: str, extra_fields: Iterable[str] = (), checkpoint: Optional[Checkpoint] = None
+):
+    """
+    Sink for one store. A resumed run reopens, in append mode, the file or collection
+    its checkpoint recorded for the store, so the whole scrape ends up in one output;
+    a new timestamped target is only made when there is no checkpoint entry
+    """
+    target = checkpoint.target(store, kind) if checkpoint else None
+    if target is None:
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        if kind == "mongo":
+            target = f"{store.title()}_{timestamp}"
+        else:
+            target = os.path.join(out_dir, f"{store}_{timestamp}.{kind}")
+        if checkpoint:
+            checkpoint.set_target(store, kind, target)
+    if kind == "mongo":
+        return MongoSink(target)
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    return CsvSink(target, extra_fields=extra_fields) if kind == "csv" else JsonlSink(target)
+
+
+async def run_stores(adapters: List[StoreAdapter], sink_kind: str, out_dir: str, checkpoint: Checkpoint, batch_size: int):
+    """
+    Scrape several stores at once, each with its own budget and sink
+    """
+
+    async def run_one(adapter):
+        sink = make_sink(sink_kind, adapter.name, out_dir, adapter.extra_fields, checkpoint)
+        try:
+            stats = await ScrapeEngine(adapter, sink, checkpoint, batch_size).run()
+        finally:
+            sink.close()
+        # A finished store starts from scratch next time
+        if not stats["failed"]:
+            checkpoint.clear(adapter.name)
+        print(f"[{adapter.name}] {stats}")
+        return stats
+
+    return await asyncio.gather(*(run_one(adapter) for adapter in adapters))
+
+
+def main():
+    from store_adapters import ADAPTERS
+
+    parser = argparse.ArgumentParser(description="Scrape stores through the shared async engine")
+    parser.add_argument("stores", nargs="+", choices=sorted(ADAPTERS))
+    parser.add_argument("--sink", choices=["jsonl", "csv", "mongo"], default="jsonl")
+    parser.add_argument("--out", default="scraped", help="Output folder for csv/jsonl sinks")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--resume", action="store_true", help="Skip pages finished by an interrupted run")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    args = parser.parse_args()
+
+    checkpoint = Checkpoint(args.checkpoint, resume=args.resume)
+    adapters = [ADAPTERS[store]() for store in args.stores]
+    asyncio.run(run_stores(adapters, args.sink, args.out, checkpoint, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import json
 import os
 import re
 import time
@@ -12,6 +13,11 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from replay_bench import recorder_from_env
+
+# Saves card markup for offline replay when SCRAPER_RECORD_FIXTURES is set
+recorder = recorder_from_env("iga")
+
 
 def get_mongo_collection() -> MongoClient:
 
@@ -241,6 +247,7 @@ def scrape_iga_catalogue():
 
             anchors = driver.find_elements(By.CSS_SELECTOR, "a[href*='itemId=']")
             seen_codes: set[str] = set()
+            card_sources: list[str] = []
             for anchor in anchors:
                 href = anchor.get_attribute("href") or ""
                 m = re.search(r"itemId=(\d+)", href)
@@ -259,6 +266,8 @@ def scrape_iga_catalogue():
                         card = anchor.find_element(By.XPATH, "./ancestor::div[contains(@class,'col')][1]")
                     except Exception:
                         card = anchor.find_element(By.XPATH, "..")
+                if recorder:
+                    card_sources.append(card.get_attribute("outerHTML"))
                 product = parse_card(card)
                 existing = product_map.get(product["product_code"])
                 if existing:
@@ -275,6 +284,8 @@ def scrape_iga_catalogue():
                         "timestamp": datetime.now().isoformat(),
                     }
 
+            if recorder and card_sources:
+                recorder.record(json.dumps(card_sources), ext="json", category=cat_name)
             print(f"  Parsed {len(seen_codes)} items from {cat_name}.")
 
         docs = list(product_map.values())
@@ -2,19 +2,28 @@ from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import NoSuchElementException
-from bs4 import BeautifulSoup
 from pymongo.mongo_client import MongoClient
 from datetime import datetime
 import time
 import os
 from dotenv import load_dotenv
 from urllib.parse import quote_plus
+from http_cache import ResponseCache
+from html_parsing import make_soup, PRODUCT_GRIDS
+from replay_bench import recorder_from_env
 
-# Setup headless browser
-options = Options()
-options.add_argument('--headless')
-options.add_argument('--disable-gpu')
-driver = webdriver.Chrome(options=options)
+# On-disk cache of parsed pages, keyed by the page source hash
+cache = ResponseCache()
+
+# Saves raw page sources for offline replay when SCRAPER_RECORD_FIXTURES is set
+recorder = recorder_from_env("adelaidesfinest")
+
+# Setup headless browser (only when scraping, so the parser can be imported offline)
+def setup_driver():
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('--disable-gpu')
+    return webdriver.Chrome(options=options)
 
 def get_text_or_default(value, default="N/A"):
     return value.text.strip() if value else default
@@ -41,7 +50,43 @@ def setup_mongo():
     collection_name = f"Adelaides_Finest_{timestamp}"
     return db[collection_name]
 
-def scrape_adelaides_finest_all_pages():
+def parse_products(html):
+    soup = make_soup(html, parse_only=PRODUCT_GRIDS["adelaidesfinest"])
+    products = soup.find_all('div', class_="results-grid__result")
+    results = []
+
+    for product in products:
+        product_name = get_text_or_default(product.find("h3", class_="title"))
+        integral = get_text_or_default(product.find('span', class_='integral'))
+        fractional = get_text_or_default(product.find('span', class_='fractional'))
+        best_price = f"{integral}.{fractional}" if integral.isdigit() and fractional.isdigit() else "N/A"
+
+        price_raw = get_text_or_default(product.find('span', class_='price__discount')).split('$')[-1].strip()
+        try:
+            item_price = float(price_raw) + float(best_price) if best_price != "N/A" else "N/A"
+        except:
+            item_price = "N/A"
+
+        unit_price = get_text_or_default(product.find('div', class_='card__product-uom'))
+        product_link = "https://shop.adelaidesfinest.com.au/" + product.find('a', class_="card__product-link").get('href') if product.find('a', class_="card__product-link") else "No link available"
+
+        data = {
+            "product_code": "N/A",
+            "category": "N/A",
+            "item_name": product_name,
+            "item_price": item_price,
+            "best_price": best_price,
+            "unit_price": unit_price,
+            "special_text": "N/A",
+            "promo_text": "N/A",
+            "link": product_link
+        }
+
+        results.append(data)
+
+    return results
+
+def scrape_adelaides_finest_all_pages(driver):
     url = "https://shop.adelaidesfinest.com.au/category/all"
     driver.get(url)
     time.sleep(5)
@@ -51,41 +96,18 @@ def scrape_adelaides_finest_all_pages():
 
     while True:
         print(f"Scraping page {page_number}...")
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        products = soup.find_all('div', class_="results-grid__result")
+        # Pages come from the browser, so only the parse step can be skipped when the source is unchanged
+        page_key = cache.key_for(url, {"page": page_number})
+        page_source = driver.page_source
+        if recorder:
+            recorder.record(page_source, page=page_number)
+        products = cache.parse_text(page_key, page_source, parse_products)
 
         if not products:
             print("No products found. Breaking.")
             break
 
-        for product in products:
-            product_name = get_text_or_default(product.find("h3", class_="title"))
-            integral = get_text_or_default(product.find('span', class_='integral'))
-            fractional = get_text_or_default(product.find('span', class_='fractional'))
-            best_price = f"{integral}.{fractional}" if integral.isdigit() and fractional.isdigit() else "N/A"
-
-            price_raw = get_text_or_default(product.find('span', class_='price__discount')).split('$')[-1].strip()
-            try:
-                item_price = float(price_raw) + float(best_price) if best_price != "N/A" else "N/A"
-            except:
-                item_price = "N/A"
-
-            unit_price = get_text_or_default(product.find('div', class_='card__product-uom'))
-            product_link = "https://shop.adelaidesfinest.com.au/" + product.find('a', class_="card__product-link").get('href') if product.find('a', class_="card__product-link") else "No link available"
-
-            data = {
-                "product_code": "N/A",
-                "category": "N/A",
-                "item_name": product_name,
-                "item_price": item_price,
-                "best_price": best_price,
-                "unit_price": unit_price,
-                "special_text": "N/A",
-                "promo_text": "N/A",
-                "link": product_link
-            }
-
-            results.append(data)
+        results.extend(products)
 
         try:
             next_button = driver.find_element(By.CSS_SELECTOR, 'a[aria-label="Next page"]')
@@ -109,5 +131,6 @@ def scrape_adelaides_finest_all_pages():
 
 if __name__ == "__main__":
     print("Starting Adelaide's Finest scrape...")
-    scrape_adelaides_finest_all_pages()
+    driver = setup_driver()
+    scrape_adelaides_finest_all_pages(driver)
     driver.quit()
@@ -1,6 +1,8 @@
 from datetime import datetime
-from bs4 import BeautifulSoup
 from utils import DiscountMateDB
+from http_cache import CachedSession
+from html_parsing import make_soup, PRODUCT_GRIDS
+from replay_bench import recorder_from_env
 import requests
 import json
 import csv
@@ -21,19 +23,29 @@ categories = ['fruit-vegetables', 'bread-bakery', 'deli-seafood', 'meat', 'ready
               'dairy', 'freezer', 'pantry', 'drinks', 'confectionery-snacks', 'baby', 
               'health-beauty', 'household-cleaning-needs', 'petcare', 'general-merch']
 
-# Function to fetch products from a given page
-def fetch_products(page, category):
-    params = {
+# Shared session with on-disk cache - unchanged pages come back as a 304 and are not re-parsed
+http = CachedSession(headers=HEADERS)
+
+# Saves raw pages for offline replay when SCRAPER_RECORD_FIXTURES is set
+recorder = recorder_from_env("drake")
+
+# Function to build the search query for one page of a category
+def page_params(page, category):
+    return {
         'page': page,
         'q[]': 'special:1',
         'q[]': f'category:{category}',
         '_pjax': '#search-results-products',
     }
+
+# Function to fetch products from a given page
+def fetch_products(page, category):
+    params = page_params(page, category)
     max_retries = 5
     retries = 0
     while retries < max_retries:
         try:
-            response = requests.get(BASE_URL, headers=HEADERS, params=params, timeout=10)
+            response = http.get(BASE_URL, params=params, timeout=10)
             response.raise_for_status()
             break
         except requests.exceptions.RequestException as e:
@@ -44,14 +56,14 @@ def fetch_products(page, category):
     if retries == max_retries:
         print(f"Failed to fetch products after {max_retries} retries")
         return None
-    return response.text
+    return response
 
 # Function to parse product details from HTML response
 def parse_products(html, category):
     if html is None:
         return []
 
-    soup = BeautifulSoup(html, 'html.parser')
+    soup = make_soup(html, parse_only=PRODUCT_GRIDS["drake"])
     product_cards = soup.select(".TalkerGrid__Item")
     products = []
 
@@ -91,8 +103,18 @@ def scrape_all_pages():
         page = 1
         while True:
             print(f"Fetching page {page}...")
-            html = fetch_products(page, category)
-            products = parse_products(html, category)
+            response = fetch_products(page, category)
+            if response is None:
+                products = []
+            else:
+                if recorder:
+                    recorder.record(response.text, category=category, page=page)
+                products = http.parse(response, lambda html: parse_products(html, category))
+                if not response.changed:
+                    # Reused from the cache, so stamp with this run's time
+                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    for product in products:
+                        product["Timestamp"] = timestamp
             
             if not products:
                 print(f"No more products found on category {category} page {page}. Ending scrape.")
@@ -1,15 +1,22 @@
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
 from pymongo.mongo_client import MongoClient
 import os
 from dotenv import load_dotenv
 from urllib.parse import quote_plus
+from http_cache import CachedSession
+from html_parsing import make_soup, strainer, PRODUCT_GRIDS
+from replay_bench import recorder_from_env
 
 headers = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
 }
 
+# Shared session with on-disk cache - unchanged pages come back as a 304 and are not re-parsed
+http = CachedSession(headers=headers)
+
+# Saves raw pages for offline replay when SCRAPER_RECORD_FIXTURES is set
+recorder = recorder_from_env("foodland")
+
 def get_text_or_default(value, default="N/A"):
     return value.text.strip() if value else default
 
@@ -43,10 +50,32 @@ def setup_mongo():
     collection_name = f"Foodland_{timestamp}"
     return db[collection_name]
 
+def parse_products(html):
+    soup = make_soup(html, parse_only=PRODUCT_GRIDS["foodland"])
+    products = soup.find_all('div', class_="TalkerGrid__Item")
+    results = []
+
+    for product in products:
+        data = {
+            "product_code": product.get('data-product-code', 'N/A'),
+            "category": get_text_or_default(product.find('div', class_='talker__breadcrumb'), 'N/A'),
+            "item_name": get_text_or_default(product.find('div', class_='talker__name talker__section').find('span')),
+            "item_price": get_text_or_default(product.find('span', class_='talker__prices__was'), 'N/A'),
+            "best_price": get_text_or_default(product.find('strong', class_='price__sell'), 'N/A'),
+            "unit_price": get_text_or_default(product.find('span', class_='talker__prices__comparison--UnitPrice'), 'N/A'),
+            "special_text": get_text_or_default(product.find('div', class_='talker__promo__special-text'), 'N/A'),
+            "promo_text": get_text_or_default(product.find('span', class_='talker__promo__text'), 'N/A'),
+            "link": "https://foodlandbalaklava.com.au" + product.find('a').get('href', '')
+        }
+
+        results.append(data)
+
+    return results
+
 def scrape_foodland():
     url = "https://foodlandbalaklava.com.au/search?page=1"
-    page = requests.get(url, headers=headers, timeout=10)
-    soup = BeautifulSoup(page.text, 'html.parser')
+    page = http.get(url, timeout=10)
+    soup = make_soup(page.text, parse_only=strainer('div', 'mfl-pagination'))
     total_pages = get_total_pages_balaklava(soup)
     print(f"Total Pages: {total_pages} Balaklava")
 
@@ -54,27 +83,14 @@ def scrape_foodland():
 
     for current_page in range(1, total_pages + 1):
         print(f"Scraping Page: {current_page}")
-        url = f"https://foodlandbalaklava.com.au/search?page={current_page}"
-        page = requests.get(url, headers=headers, timeout=10)
+        if current_page > 1:
+            url = f"https://foodlandbalaklava.com.au/search?page={current_page}"
+            page = http.get(url, timeout=10)
 
         if page.status_code == 200:
-            soup = BeautifulSoup(page.text, 'html.parser')
-            products = soup.find_all('div', class_="TalkerGrid__Item")
-
-            for product in products:
-                data = {
-                    "product_code": product.get('data-product-code', 'N/A'),
-                    "category": get_text_or_default(product.find('div', class_='talker__breadcrumb'), 'N/A'),
-                    "item_name": get_text_or_default(product.find('div', class_='talker__name talker__section').find('span')),
-                    "item_price": get_text_or_default(product.find('span', class_='talker__prices__was'), 'N/A'),
-                    "best_price": get_text_or_default(product.find('strong', class_='price__sell'), 'N/A'),
-                    "unit_price": get_text_or_default(product.find('span', class_='talker__prices__comparison--UnitPrice'), 'N/A'),
-                    "special_text": get_text_or_default(product.find('div', class_='talker__promo__special-text'), 'N/A'),
-                    "promo_text": get_text_or_default(product.find('span', class_='talker__promo__text'), 'N/A'),
-                    "link": "https://foodlandbalaklava.com.au" + product.find('a').get('href', '')
-                }
-
-                results.append(data)
+            if recorder:
+                recorder.record(page.text, page=current_page)
+            results.extend(http.parse(page, parse_products))
 
     if results:
         collection = setup_mongo()
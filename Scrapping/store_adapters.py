@@ -0,0 +1,134 @@
+"""
+Store adapters for scrape_engine. Each adapter reuses the parsing code from the
+store's own script and only describes how its pages are addressed.
+
+Browser-driven stores (Coles, Woolworths, IGA, Adelaide's Finest) still run from
+their own scripts, as their pages cannot be fetched with plain HTTP.
+"""
+
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from html_parsing import make_soup, strainer
+from http_cache import CachedResponse
+from scrape_engine import StoreAdapter
+
+SCRAPPING_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class DrakeAdapter(StoreAdapter):
+    name = "drake"
+    concurrency = 4
+    rate = 2.0
+
+    def __init__(self):
+        import scraper_drake
+        self.store = scraper_drake
+        self.headers = scraper_drake.HEADERS
+
+    def categories(self) -> List[Optional[str]]:
+        return list(self.store.categories)
+
+    def page_request(self, category: Optional[str], page: int) -> Tuple[str, Optional[Dict[str, Any]]]:
+        return self.store.BASE_URL, self.store.page_params(page, category)
+
+    def parse(self, text: str, category: Optional[str]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "category": product["Category"],
+                "item_name": f"{product['Name']} {product['Size']}" if product["Size"] != "N/A" else product["Name"],
+                "item_price": product["Previous Price"],
+                "best_price": product["Price"],
+                "unit_price": product["Unit Price"],
+            }
+            for product in self.store.parse_products(text, category)
+        ]
+
+
+class FoodlandAdapter(StoreAdapter):
+    name = "foodland"
+    concurrency = 4
+    rate = 2.0
+    base_url = "https://foodlandbalaklava.com.au/search"
+
+    def __init__(self):
+        import scraper_foodland
+        self.store = scraper_foodland
+        self.headers = scraper_foodland.headers
+
+    def page_request(self, category: Optional[str], page: int) -> Tuple[str, Optional[Dict[str, Any]]]:
+        return f"{self.base_url}?page={page}", None
+
+    def total_pages(self, category: Optional[str], first_page: CachedResponse) -> Optional[int]:
+        soup = make_soup(first_page.text, parse_only=strainer("div", "mfl-pagination"))
+        return self.store.get_total_pages_balaklava(soup)
+
+    def parse(self, text: str, category: Optional[str]) -> List[Dict[str, Any]]:
+        return self.store.parse_products(text)
+
+
+class CostcoAdapter(StoreAdapter):
+    """
+    Hot-buys search API. The first page gives totalPages, then every remaining
+    page is fetched concurrently
+    """
+
+    name = "costco"
+    concurrency = 6
+    rate = 4.0
+    timeout = 30
+    fixture_ext = "json"
+    page_size = int(os.getenv("COSTCO_PAGE_SIZE", 48))
+    # Every column the standalone Costco scraper has always written, under its original name,
+    # so readers of costco_products.csv keep working next to the canonical columns
+    extra_fields = [
+        "name", "value", "product_link", "code", "averageRating",
+        "discount_value", "discount_end_date", "discount_start_date", "in_stock", "images_link",
+    ]
+
+    def __init__(self):
+        sys.path.insert(0, os.path.join(SCRAPPING_DIR, "costco_scrapeing_tool"))
+        import scraper_costco
+        self.store = scraper_costco
+        self.headers = scraper_costco.headers
+
+    def page_request(self, category: Optional[str], page: int) -> Tuple[str, Optional[Dict[str, Any]]]:
+        query_params = {
+            "fields": "FULL",
+            "query": "",
+            "pageSize": self.page_size,
+            "category": "hot-buys",
+            "lang": "en_AU",
+            "curr": "AUD",
+        }
+        if page > 1:
+            query_params["currentPage"] = page - 1
+        return self.store.base_url, query_params
+
+    def total_pages(self, category: Optional[str], first_page: CachedResponse) -> Optional[int]:
+        return first_page.json()["pagination"]["totalPages"]
+
+    def parse(self, text: str, category: Optional[str]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "product_code": row["code"],
+                "category": "hot-buys",
+                "item_name": row["name"],
+                # price.value is the shelf price, the hot-buy coupon comes off at the till
+                "item_price": row["value"],
+                "best_price": round(row["value"] - row["discount_value"], 2) if row["discount_value"] else row["value"],
+                "special_text": f"Ends {row['discount_end_date']}" if row["discount_end_date"] != "N/A" else "N/A",
+                "promo_text": f"Save ${row['discount_value']}" if row["discount_value"] else "N/A",
+                "link": row["product_link"],
+                **{field: row[field] for field in self.extra_fields},
+            }
+            for row in self.store.parse_page(text)["rows"]
+        ]
+
+
+ADAPTERS = {
+    DrakeAdapter.name: DrakeAdapter,
+    FoodlandAdapter.name: FoodlandAdapter,
+    CostcoAdapter.name: CostcoAdapter,
+}
@@ -0,0 +1,88 @@
+import os
+import re
+import sys
+
+import pandas as pd
+import pytest
+
+ALDI_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..",
+    "Aldi Scraping From a Catalogue and Item Classification (Attempt 1)",
+)
+sys.path.insert(0, ALDI_DIR)
+
+from aldi_parser import (  # noqa: E402
+    CATEGORIES,
+    DEFAULT_CATEGORY,
+    KeywordClassifier,
+    classify,
+    classify_item,
+    clean_items,
+    parse_catalogue_text,
+    parse_lines,
+)
+
+
+# The loops aldi_parser replaced, kept here as the reference behaviour
+def reference_parse(lines):
+    pattern = r"([A-Za-z\s']+)\s(\d{1,4}[a-zA-Z]+)?\s?\$(\d{1,2}\.\d{1,2})"
+    item, quantity, price = [], [], []
+    for line in lines:
+        match = re.search(pattern, line.strip())
+        if match:
+            item.append(match.group(1).strip())
+            quantity.append(match.group(2).strip() if match.group(2) else None)
+            price.append(match.group(3))
+    df = pd.DataFrame({'item': item, 'quantity': quantity, 'price': price})
+    df['item'] = df['item'].apply(lambda x: re.sub(r'^[A-Za-z]\s', '', x) if isinstance(x, str) else x)
+    df = df[~df['item'].str.match(r'^\w+$', na=False)]
+    return df.reset_index(drop=True)
+
+
+def reference_classify(item, category_dict):
+    for category, keywords in category_dict.items():
+        if any(keyword.lower() in item.lower() for keyword in keywords):
+            return category
+    return 'Miscellaneous'
+
+
+@pytest.fixture
+def catalogue_lines():
+    with open(os.path.join(ALDI_DIR, "xodo_result.txt"), "r", encoding="utf-8") as f:
+        return f.readlines()
+
+
+def test_parse_matches_the_original_loop(catalogue_lines):
+    parsed = clean_items(parse_lines(catalogue_lines))
+    expected = reference_parse(catalogue_lines)
+    assert len(parsed) > 0
+    assert parsed['item'].tolist() == expected['item'].tolist()
+    assert parsed['price'].tolist() == expected['price'].tolist()
+    missing_as_none = lambda values: [value if isinstance(value, str) else None for value in values]
+    assert missing_as_none(parsed['quantity']) == missing_as_none(expected['quantity'])
+
+
+def test_classify_matches_the_original_loop(catalogue_lines):
+    df = parse_catalogue_text(catalogue_lines)
+    assert df['category'].tolist() == [reference_classify(item, CATEGORIES) for item in df['item']]
+
+
+@pytest.mark.parametrize("item", [
+    "Frozen Chicken Nuggets",     # Freezer keyword, but 'Chicken' comes from an earlier category
+    "Chocolate Cake",             # Bakery before Snacks & Confectionery
+    "Peanut Butter Cookies",      # 'Butter' (Dairy) is inside 'Peanut Butter' (Pantry)
+    "Sausage Roll Pack",          # Bakery 'Roll' before Deli 'Sausage Roll'
+    "Soy Sauce Noodles",
+    "Mystery Box",
+    "",
+])
+def test_classify_item_picks_the_first_matching_category(item):
+    assert classify_item(item) == reference_classify(item, CATEGORIES)
+
+
+def test_custom_categories_keep_their_order():
+    categories = {'B': ['ice cream'], 'A': ['cream']}
+    items = pd.Series(["Ice Cream Tub", "Sour Cream", "Bread"])
+    expected = [reference_classify(item, categories) for item in items]
+    assert classify(items, categories).tolist() == expected == ['B', 'A', DEFAULT_CATEGORY]
+    assert KeywordClassifier(categories).categories == ['B', 'A', DEFAULT_CATEGORY]
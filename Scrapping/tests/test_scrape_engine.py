@@ -0,0 +1,152 @@
+import asyncio
+import csv
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from http_cache import CachedResponse  # noqa: E402
+from scrape_engine import CANONICAL_FIELDS, Checkpoint, ScrapeEngine, StoreAdapter, make_sink  # noqa: E402
+
+
+class ListAdapter(StoreAdapter):
+    """
+    Serves pages from a dict instead of the network: {page: [item names]}, a missing
+    page is empty and a page in `failing` cannot be fetched
+    """
+
+    name = "teststore"
+    concurrency = 2
+    rate = 1000.0
+
+    def __init__(self, pages, total=None, failing=()):
+        self.pages = pages
+        self.total = total
+        self.failing = set(failing)
+        self.fetched = []
+
+    def page_request(self, category, page):
+        return f"https://example.invalid/{category}/{page}", None
+
+    def total_pages(self, category, first_page):
+        return self.total
+
+    def parse(self, text, category):
+        return [{"item_name": name, "product_code": name} for name in json.loads(text)]
+
+
+class ListSink:
+    def __init__(self):
+        self.rows = []
+
+    def write(self, rows):
+        self.rows.extend(rows)
+
+    def close(self):
+        pass
+
+
+def run_engine(adapter, checkpoint, tmp_path, batch_size=500):
+    sink = ListSink()
+    engine = ScrapeEngine(adapter, sink, checkpoint, batch_size=batch_size, cache_dir=str(tmp_path / "cache"))
+
+    async def fetch(category, page):
+        adapter.fetched.append(page)
+        if page in adapter.failing:
+            engine.stats["failed"] += 1
+            return None
+        text = json.dumps(adapter.pages.get(page, []))
+        return CachedResponse(f"page-{page}", 200, text, f"{category}-{page}", True, False)
+
+    engine.fetch = fetch
+    stats = asyncio.run(engine.run())
+    return stats, sorted(row["item_name"] for row in sink.rows)
+
+
+@pytest.fixture(autouse=True)
+def no_recording(monkeypatch):
+    monkeypatch.delenv("SCRAPER_RECORD_FIXTURES", raising=False)
+
+
+def test_rows_are_canonical(tmp_path):
+    adapter = ListAdapter({1: ["a"]}, total=1)
+    sink = ListSink()
+    engine = ScrapeEngine(adapter, sink, None, cache_dir=str(tmp_path / "cache"))
+    response = CachedResponse("u", 200, json.dumps(["a"]), "k", True, False)
+    rows = asyncio.run(engine.parse(response, None))
+    assert list(rows[0]) == CANONICAL_FIELDS
+    assert rows[0]["store"] == "teststore" and rows[0]["item_name"] == "a" and rows[0]["link"] == "N/A"
+
+
+def test_open_ended_listing_stops_at_the_first_empty_page(tmp_path):
+    adapter = ListAdapter({1: ["a"], 2: ["b"], 3: ["c"], 4: ["d"], 5: ["e"]})
+    stats, names = run_engine(adapter, None, tmp_path)
+    assert names == ["a", "b", "c", "d", "e"]
+    assert stats["pages"] == 5
+    assert 6 in adapter.fetched
+
+
+def test_failed_page_is_skipped_and_left_out_of_the_checkpoint(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"), resume=False)
+    adapter = ListAdapter({1: ["a"], 2: ["b"], 3: ["c"], 4: ["d"]}, failing={2})
+    stats, names = run_engine(adapter, checkpoint, tmp_path)
+    assert names == ["a", "c", "d"]
+    assert stats["failed"] == 1
+    assert sorted(checkpoint.done["teststore"]["None"]) == [1, 3, 4]
+
+
+def test_resume_only_scrapes_the_pages_the_checkpoint_lacks(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    first = ListAdapter({1: ["a"], 2: ["b"], 3: ["c"]}, total=3, failing={3})
+    run_engine(first, Checkpoint(path, resume=False), tmp_path)
+
+    second = ListAdapter({1: ["a"], 2: ["b"], 3: ["c"]}, total=3)
+    stats, names = run_engine(second, Checkpoint(path, resume=True), tmp_path)
+    # Page 1 is always fetched for the page count, but its rows are not written again
+    assert names == ["c"]
+    assert stats["skipped"] == 2
+    assert sorted(second.fetched) == [1, 3]
+
+
+def test_checkpoint_saves_the_written_pages(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint = Checkpoint(path, resume=False)
+    run_engine(ListAdapter({1: ["a"], 2: ["b"]}, total=2), checkpoint, tmp_path, batch_size=1)
+    with open(path, "r", encoding="utf-8") as f:
+        saved = json.load(f)
+    assert sorted(saved["pages"]["teststore"]["None"]) == [1, 2]
+
+
+def test_checkpoint_loads_the_pages_only_format(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    path.write_text(json.dumps({"teststore": {"None": [1, 2]}}), encoding="utf-8")
+    checkpoint = Checkpoint(str(path), resume=True)
+    assert checkpoint.is_done("teststore", None, 2)
+    assert checkpoint.target("teststore", "csv") is None
+
+
+def test_resumed_sink_appends_to_the_interrupted_runs_file(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    out_dir = str(tmp_path / "out")
+    row = {field: "x" for field in CANONICAL_FIELDS}
+
+    sink = make_sink("csv", "teststore", out_dir, checkpoint=Checkpoint(path, resume=False))
+    sink.write([row])
+    sink.close()
+
+    checkpoint = Checkpoint(path, resume=True)
+    sink = make_sink("csv", "teststore", out_dir, checkpoint=checkpoint)
+    sink.write([row])
+    sink.close()
+
+    files = os.listdir(out_dir)
+    assert len(files) == 1
+    with open(os.path.join(out_dir, files[0]), newline="", encoding="utf-8") as f:
+        assert len(list(csv.DictReader(f))) == 2
+
+    # A finished store starts a new file next time
+    checkpoint.clear("teststore")
+    assert Checkpoint(path, resume=True).target("teststore", "csv") is None